@@ -3,6 +3,9 @@ import argparse
 from pathlib import Path
 import pandas as pd
 
+import metrics
+import profiling
+
 # Columns we expect in the CSV
 REQUIRED_COLS = [
     "article_id", "primary_company", "company_one_liner",
@@ -48,6 +51,7 @@ def _is_empty_list_like(x: str) -> bool:
         return len(parts) == 0
     return False
 
+@metrics.timed("audit.find_failed_ids")
 def find_failed_ids(df: pd.DataFrame) -> list[str]:
     # Defensive: ensure required columns exist
     missing = [c for c in REQUIRED_COLS if c not in df.columns]
@@ -98,8 +102,13 @@ def main():
     ap = argparse.ArgumentParser(description="Find article_ids with failed/empty enrichment and write to a txt file.")
     ap.add_argument("csv_path", help="Path to articles.csv")
     ap.add_argument("out_txt", help="Output txt file with one article_id per line")
+    profiling.add_arguments(ap)
     args = ap.parse_args()
 
+    with profiling.from_args(args, "audit"):
+        run_audit(args)
+
+def run_audit(args):
     csv_path = Path(args.csv_path)
     out_txt = Path(args.out_txt)
 
@@ -107,7 +116,8 @@ def main():
         raise SystemExit(f"CSV not found: {csv_path}")
 
     # Keep strings as strings, avoid NA auto-conversion
-    df = pd.read_csv(csv_path, dtype={"article_id": str}, keep_default_na=False, encoding="utf-8-sig")
+    with metrics.timer("audit.read_csv"):
+        df = pd.read_csv(csv_path, dtype={"article_id": str}, keep_default_na=False, encoding="utf-8-sig")
 
     ids = find_failed_ids(df)
     if not ids:
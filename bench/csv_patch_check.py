@@ -0,0 +1,80 @@
+"""
+Check that export.patch_csv leaves the same bytes as a full export.
+
+    python bench/csv_patch_check.py                  # synthetic 5k-article DB
+    python bench/csv_patch_check.py --articles 50000
+
+Builds a scratch DB, exports the CSV, then for each scenario (delete,
+update, publish_date change, a row the snapshot does not have yet) applies
+it to the DB, patches the snapshot and compares it with export_csv_atomic
+written to a second file. Exits 1 on any difference.
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare patch_csv with a full CSV export")
+    ap.add_argument("--articles", type=int, default=5000, help="Rows in the synthetic DB")
+    args = ap.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="gbi-csvpatch-"))
+    os.environ["DB_PATH"] = str(tmp / "patch.db")  # never the real data/news.db
+    from service_load import build_synthetic_db
+    build_synthetic_db(tmp / "patch.db", args.articles)
+
+    import storage
+    from export import export_csv_atomic, patch_csv
+
+    snapshot, full = tmp / "articles.csv", tmp / "full.csv"
+    export_csv_atomic(str(snapshot))
+    ids = [str(60000 + i) for i in range(args.articles)]
+
+    # each scenario changes the DB and returns (removed ids, changed ids) for patch_csv
+    def delete():
+        storage.delete_articles(ids[::7])
+        return set(ids[::7]), set()
+
+    def update():
+        storage.update_articles(ids[1::5], {"primary_company": "Pfizer", "keywords": ["GLP-1"]})
+        return set(), set(ids[1::5])
+
+    def date_change():  # rows must move to the top
+        storage.update_articles(ids[3:5], {"publish_date": "2030-01-01"})
+        return set(), set(ids[3:5])
+
+    def missing_row():  # not in the snapshot yet
+        storage.upsert_article({"article_id": "patch-new", "url": "https://example.invalid/new",
+                                "headline": "new", "publish_date": "2024-06-15",
+                                "companies_ranked": ["Pfizer"], "primary_company": "Pfizer", "keywords": ["CDMO"]})
+        return set(), {"patch-new"}
+
+    def delete_and_update():
+        storage.delete_articles(ids[2::11])
+        storage.update_articles(ids[6::13], {"headline": "改寫"})
+        return set(ids[2::11]), set(ids[6::13])
+
+    scenarios = [("delete", delete), ("update", update), ("date change", date_change),
+                 ("missing row", missing_row), ("delete + update", delete_and_update)]
+
+    failed = False
+    for name, apply in scenarios:
+        removed, changed = apply()
+        patch_csv(str(snapshot), removed=removed, changed=changed)
+        export_csv_atomic(str(full))
+        ok = snapshot.read_bytes() == full.read_bytes()
+        failed |= not ok
+        print(f"{'OK ' if ok else 'FAIL'} {name}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
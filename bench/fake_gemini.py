@@ -0,0 +1,66 @@
+"""
+Drop-in stand-in for google.genai.Client used by GeminiEnricher, with
+configurable latency and error rate. Only `client.models.generate_content`
+is implemented.
+"""
+from __future__ import annotations
+import json
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+
+class FakeGeminiError(RuntimeError):
+    pass
+
+
+class _Models:
+    def __init__(self, owner: "FakeGeminiClient"):
+        self._owner = owner
+
+    def generate_content(self, *, model: str, contents) -> SimpleNamespace:
+        return self._owner._generate(model, contents)
+
+
+class FakeGeminiClient:
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 empty_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.empty_rate = empty_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.models = _Models(self)
+
+    def _generate(self, model: str, contents) -> SimpleNamespace:
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+            fail = self._rng.random() < self.error_rate
+            empty = self._rng.random() < self.empty_rate
+        if delay:
+            time.sleep(delay)
+        if fail:
+            with self._lock:
+                self.errors += 1
+            raise FakeGeminiError("503 UNAVAILABLE (fake)")
+
+        prompt = contents if isinstance(contents, str) else json.dumps(contents, ensure_ascii=False)
+        text = "" if empty else json.dumps({
+            "companies_ranked": ["Johnson & Johnson", "台灣生技 (Taiwan Bio)", "MSD (默沙東)"],
+            "keywords": ["細胞治療", "CDMO", "GLP-1", "FDA批准", "智慧醫療"],
+            "primary_company": "Johnson & Johnson",
+            "company_one_liner": "嬌生是一家跨國醫療保健公司，業務涵蓋創新藥物與醫療科技。",
+            "summary_zh_tw": "本文為基準測試用的摘要內容。",
+            "summary_en": "Benchmark summary placeholder.",
+        }, ensure_ascii=False)
+        usage = SimpleNamespace(
+            prompt_token_count=len(prompt) // 2,
+            candidates_token_count=len(text) // 2,
+            total_token_count=(len(prompt) + len(text)) // 2,
+        )
+        return SimpleNamespace(text=text, usage_metadata=usage)
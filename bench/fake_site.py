@@ -0,0 +1,152 @@
+"""
+Local stand-in for news.gbimonthly.com, serving the recorded fixtures in
+bench/fixtures with a configurable per-request latency.
+
+    python bench/fake_site.py --port 8765 --pages 5 --latency 0.05
+    BASE_INDEX_URL=http://127.0.0.1:8765/tw/article/index.php python pipeline.py --no-enrich
+"""
+from __future__ import annotations
+import argparse
+import random
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from string import Template
+from urllib.parse import urlparse, parse_qsl
+
+FIXTURES = Path(__file__).parent / "fixtures"
+INDEX_PATH = "/tw/article/index.php"
+ARTICLE_PATH = "/tw/article/show.php"
+FIRST_ID = 80000
+
+
+class FakeSite:
+    def __init__(self, pages: int = 5, per_page: int = 12, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, seed: int = 0):
+        self.pages = pages
+        self.per_page = per_page
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._index = Template((FIXTURES / "index.html").read_text(encoding="utf-8"))
+        self._item = Template((FIXTURES / "index_item.html").read_text(encoding="utf-8"))
+        self._articles = [Template(p.read_text(encoding="utf-8")) for p in sorted(FIXTURES.glob("article_*.html"))]
+        self.hits = 0
+        self._server: ThreadingHTTPServer | None = None
+
+    # --- content -----------------------------------------------------------
+    def article_ids(self) -> list[str]:
+        total = self.pages * self.per_page
+        return [str(FIRST_ID + total - k) for k in range(total)]
+
+    def index_html(self, page: int) -> str:
+        start = (page - 1) * self.per_page
+        items = []
+        for k, num in enumerate(self.article_ids()[start: start + self.per_page], start):
+            d = date(2025, 9, 12) - timedelta(days=k // 4)
+            items.append(self._item.substitute(
+                num=num, page=page, date=d.isoformat(),
+                headline=f"生醫新聞 #{num}", teaser="業者指出，法規路徑明朗化之後訂單明顯增加。",
+            ))
+        pager = []
+        if page > 1:
+            pager.append('    <li><a class="first" href="index.php?page=1">第一頁</a></li>')
+            pager.append(f'    <li><a class="prev" href="index.php?page={page - 1}">上一頁</a></li>')
+        for p in range(max(1, page - 2), min(self.pages, page + 2) + 1):
+            cls = ' class="active"' if p == page else ""
+            pager.append(f'    <li{cls}><a href="index.php?page={p}">{p}</a></li>')
+        if page < self.pages:
+            pager.append(f'    <li><a class="next" href="index.php?page={page + 1}">下一頁</a></li>')
+            pager.append(f'    <li><a class="last" href="index.php?page={self.pages}">最末頁</a></li>')
+        return self._index.substitute(items="\n".join(items), pager="\n".join(pager))
+
+    def article_html(self, num: str) -> str:
+        tmpl = self._articles[int(num) % len(self._articles)]
+        return tmpl.substitute(num=num)
+
+    # --- server ------------------------------------------------------------
+    def _delay(self) -> tuple[float, bool]:
+        with self._rng_lock:
+            d = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+            fail = self._rng.random() < self.error_rate
+        return d, fail
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                site.hits += 1
+                delay, fail = site._delay()
+                if delay:
+                    time.sleep(delay)
+                if fail:
+                    self.send_error(503, "Service Unavailable")
+                    return
+                u = urlparse(self.path)
+                qs = dict(parse_qsl(u.query))
+                if u.path == INDEX_PATH:
+                    page = int(qs.get("page", "1"))
+                    if not 1 <= page <= site.pages:
+                        self.send_error(404)
+                        return
+                    body = site.index_html(page)
+                elif u.path == ARTICLE_PATH and qs.get("num", "").isdigit():
+                    body = site.article_html(qs["num"])
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serve in a background thread; returns the index URL to use as BASE_INDEX_URL."""
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        h, p = self._server.server_address[:2]
+        return f"http://{h}:{p}{INDEX_PATH}"
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Serve recorded GBI fixtures locally")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--pages", type=int, default=5, help="Number of index pages")
+    ap.add_argument("--per-page", type=int, default=12, help="Articles per index page")
+    ap.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    ap.add_argument("--jitter", type=float, default=0.0, help="Extra random latency, 0..jitter seconds")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    args = ap.parse_args()
+
+    site = FakeSite(pages=args.pages, per_page=args.per_page, latency=args.latency,
+                    jitter=args.jitter, error_rate=args.error_rate)
+    url = site.start(args.host, args.port)
+    print(f"Serving {args.pages} index page(s) → BASE_INDEX_URL={url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        site.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Offline throughput benchmark: local fixture site + fake Gemini + temp DB.
+
+    python bench/run_bench.py --pages 5 --site-latency 0.02 --gemini-latency 0.2 --out bench.json
+    python bench/run_bench.py --baseline bench.json --tolerance 0.25   # exit 1 on regression
+
+Reports articles/sec, p50/p99 per stage and peak RSS for crawl_links,
+parse_article_page, GeminiEnricher.enrich, upsert_article and export_csv_atomic.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from fake_gemini import FakeGeminiClient  # noqa: E402
+from fake_site import FakeSite  # noqa: E402
+
+STAGES = ["crawl_links", "parse_article_page", "enrich", "upsert_article", "export_csv_atomic"]
+
+
+def _peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _pct(samples: list[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    s = sorted(samples)
+    return s[min(len(s) - 1, max(0, round(q * len(s) + 0.5) - 1))]
+
+
+def _stage_summary(samples: list[float], rss: float | None) -> dict:
+    total = sum(samples)
+    return {
+        "count": len(samples),
+        "total_s": round(total, 4),
+        "per_sec": round(len(samples) / total, 2) if total else None,
+        "p50_ms": round(_pct(samples, 0.50) * 1000, 3),
+        "p99_ms": round(_pct(samples, 0.99) * 1000, 3),
+        "peak_rss_mb": round(rss, 1) if rss is not None else None,
+    }
+
+
+def run(args) -> dict:
+    site = FakeSite(pages=args.pages, per_page=args.per_page, latency=args.site_latency,
+                    jitter=args.site_jitter, error_rate=args.site_error_rate)
+    tmp = Path(tempfile.mkdtemp(prefix="gbi-bench-"))
+    os.environ["BASE_INDEX_URL"] = site.start()
+    os.environ["DB_PATH"] = str(tmp / "bench.db")
+
+    # Imported late so config picks up the overrides above.
+    from crawler import crawl_links
+    from parser import parse_article_page
+    from enrich import GeminiEnricher
+    from storage import init_db, upsert_article
+    from export import export_csv_atomic
+    from tenacity import wait_none
+
+    fake = FakeGeminiClient(latency=args.gemini_latency, jitter=args.gemini_jitter,
+                            error_rate=args.gemini_error_rate)
+    enricher = GeminiEnricher(model_name="fake-gemini", client=fake)
+    enrich = GeminiEnricher.enrich
+    if not args.real_backoff:
+        enrich = enrich.retry_with(wait=wait_none())
+
+    init_db()
+    samples: dict[str, list[float]] = {s: [] for s in STAGES}
+    rss: dict[str, float | None] = {}
+    enrich_failures = 0
+
+    urls: list[str] = []
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        urls = crawl_links(max_pages=args.pages)
+        samples["crawl_links"].append(time.perf_counter() - t0)
+    rss["crawl_links"] = _peak_rss_mb()
+
+    arts = []
+    for url in urls:
+        t0 = time.perf_counter()
+        arts.append(parse_article_page(url))
+        samples["parse_article_page"].append(time.perf_counter() - t0)
+    rss["parse_article_page"] = _peak_rss_mb()
+
+    rows = []
+    for art in arts:
+        t0 = time.perf_counter()
+        try:
+            data = enrich(enricher, title=art["headline"], date=art["publish_date"], body=art["body"])
+        except Exception:
+            enrich_failures += 1
+            data = {"companies_ranked": [], "primary_company": "Unknown", "company_one_liner": "",
+                    "summary_zh_tw": "", "summary_en": ""}
+        samples["enrich"].append(time.perf_counter() - t0)
+        rows.append({**art, **data})
+    rss["enrich"] = _peak_rss_mb()
+
+    for row in rows:
+        t0 = time.perf_counter()
+        upsert_article(row)
+        samples["upsert_article"].append(time.perf_counter() - t0)
+    rss["upsert_article"] = _peak_rss_mb()
+
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        export_csv_atomic(str(tmp / "articles.csv"))
+        samples["export_csv_atomic"].append(time.perf_counter() - t0)
+    rss["export_csv_atomic"] = _peak_rss_mb()
+
+    site.stop()
+
+    per_article = sum(sum(samples[s]) for s in ("parse_article_page", "enrich", "upsert_article"))
+    crawl = sum(samples["crawl_links"]) / max(1, args.repeat)
+    export = sum(samples["export_csv_atomic"]) / max(1, args.repeat)
+    wall = crawl + per_article + export
+    return {
+        "articles": len(arts),
+        "articles_per_sec": round(len(arts) / wall, 2) if wall else None,
+        "stages": {s: _stage_summary(samples[s], rss[s]) for s in STAGES},
+        "peak_rss_mb": round(_peak_rss_mb() or 0, 1) or None,
+        "http_requests": site.hits,
+        "gemini_calls": fake.calls,
+        "gemini_errors": fake.errors,
+        "enrich_failures": enrich_failures,
+        "params": {k: v for k, v in vars(args).items() if k not in ("out", "baseline")},
+    }
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Return human-readable regressions of `result` against `baseline`."""
+    problems = []
+    base_aps, aps = baseline.get("articles_per_sec"), result.get("articles_per_sec")
+    if base_aps and aps and aps < base_aps * (1 - tolerance):
+        problems.append(f"articles/sec {aps} < baseline {base_aps} (-{tolerance:.0%})")
+    for stage, cur in result["stages"].items():
+        base = baseline.get("stages", {}).get(stage)
+        if not base:
+            continue
+        for key in ("p50_ms", "p99_ms"):
+            if base[key] and cur[key] > base[key] * (1 + tolerance):
+                problems.append(f"{stage} {key} {cur[key]} > baseline {base[key]} (+{tolerance:.0%})")
+    return problems
+
+
+def _print_report(result: dict):
+    print(f"Articles: {result['articles']}  |  {result['articles_per_sec']} articles/sec  |  "
+          f"peak RSS {result['peak_rss_mb']} MB")
+    print(f"{'stage':<22}{'count':>7}{'per_sec':>10}{'p50_ms':>10}{'p99_ms':>10}{'rss_mb':>9}")
+    for stage, s in result["stages"].items():
+        print(f"{stage:<22}{s['count']:>7}{str(s['per_sec']):>10}{s['p50_ms']:>10}{s['p99_ms']:>10}"
+              f"{str(s['peak_rss_mb']):>9}")
+    print(f"HTTP requests: {result['http_requests']}  |  Gemini calls: {result['gemini_calls']} "
+          f"(errors {result['gemini_errors']}, failed articles {result['enrich_failures']})")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Offline pipeline benchmark (no network)")
+    ap.add_argument("--pages", type=int, default=5, help="Index pages served by the fake site")
+    ap.add_argument("--per-page", type=int, default=12, help="Articles per index page")
+    ap.add_argument("--repeat", type=int, default=3, help="Repetitions for crawl_links / export_csv_atomic")
+    ap.add_argument("--site-latency", type=float, default=0.0, help="Seconds per HTTP response")
+    ap.add_argument("--site-jitter", type=float, default=0.0)
+    ap.add_argument("--site-error-rate", type=float, default=0.0, help="Fraction of 503 responses")
+    ap.add_argument("--gemini-latency", type=float, default=0.0, help="Seconds per fake Gemini call")
+    ap.add_argument("--gemini-jitter", type=float, default=0.0)
+    ap.add_argument("--gemini-error-rate", type=float, default=0.0, help="Fraction of failing Gemini calls")
+    ap.add_argument("--real-backoff", action="store_true",
+                    help="Keep tenacity's exponential waits between Gemini retries")
+    ap.add_argument("--out", help="Write JSON results here")
+    ap.add_argument("--baseline", help="Previous JSON results; exit 1 if slower than --tolerance")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs baseline (0.25 = 25%%)")
+    args = ap.parse_args()
+
+    result = run(args)
+    _print_report(result)
+    if args.out:
+        Path(args.out).write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"Wrote results → {args.out}")
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        problems = compare(result, baseline, args.tolerance)
+        for p in problems:
+            print(f"[Regression] {p}")
+        if problems:
+            sys.exit(1)
+        print("[Baseline] no regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Load test for service.py.
+
+    python bench/service_load.py                         # synthetic 20k-article DB
+    python bench/service_load.py --db data/news.db --threads 16 --duration 20
+
+Starts the service in-process on a free port, hammers it from N client
+threads with a mix of endpoints (including follow-up pages via next_cursor),
+and reports req/s, p50/p99 latency and the cache hit ratio. With
+--write-every, a writer upserts an article periodically to exercise cache
+invalidation.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from pathlib import Path
+from urllib.parse import quote
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+COMPANIES = ["Johnson & Johnson", "Novo Nordisk", "MSD (默沙東)", "台灣生技 (Taiwan Bio)", "安成生技", "Pfizer"]
+KEYWORDS = ["細胞治療", "CDMO", "GLP-1", "FDA批准", "智慧醫療", "罕病新藥", "膀胱癌", "裁員"]
+
+
+def build_synthetic_db(path: Path, n: int):
+    os.environ["DB_PATH"] = str(path)
+    import storage
+
+    storage.init_db()
+    rng = random.Random(0)
+    with storage.get_conn(path) as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO articles (article_id, url, headline, publish_date, companies_ranked, "
+            "primary_company, company_one_liner, summary_zh_tw, summary_en, keywords) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (str(60000 + i), f"https://example.invalid/show.php?num={60000 + i}", f"生醫新聞 #{i}",
+                 f"20{18 + i % 8}-{1 + i % 12:02d}-{1 + i % 28:02d}",
+                 json.dumps(rng.sample(COMPANIES, 3), ensure_ascii=False), rng.choice(COMPANIES),
+                 "一句話介紹。", "摘要。" * 20, "Summary. " * 20,
+                 json.dumps(rng.sample(KEYWORDS, 4), ensure_ascii=False))
+                for i in range(n)
+            ],
+        )
+
+
+def _requests(rng: random.Random) -> str:
+    kind = rng.random()
+    if kind < 0.3:
+        return f"/articles/latest?limit={rng.choice([10, 20, 50])}"
+    if kind < 0.55:
+        return f"/articles/by-company?name={quote(rng.choice(COMPANIES))}"
+    if kind < 0.8:
+        return f"/articles/by-keyword?keyword={quote(rng.choice(KEYWORDS))}"
+    y = rng.randint(2018, 2025)
+    return f"/articles/by-date?from={y}-01-01&to={y}-06-30"
+
+
+def _pct(s: list[float], q: float) -> float:
+    return s[min(len(s) - 1, max(0, round(q * len(s) + 0.5) - 1))] if s else 0.0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Load-test the read-only article service")
+    ap.add_argument("--db", help="Existing DB (default: build a synthetic one)")
+    ap.add_argument("--articles", type=int, default=20000, help="Rows in the synthetic DB")
+    ap.add_argument("--threads", type=int, default=8)
+    ap.add_argument("--duration", type=float, default=10.0, help="Seconds")
+    ap.add_argument("--cache-size", type=int, default=1024)
+    ap.add_argument("--follow-pages", type=float, default=0.3, help="Chance to fetch the next page")
+    ap.add_argument("--write-every", type=float, default=0.0, help="Upsert one article every N seconds (0 = off)")
+    args = ap.parse_args()
+
+    if args.db:
+        db = Path(args.db)
+        os.environ["DB_PATH"] = str(db)
+    else:
+        db = Path(tempfile.mkdtemp(prefix="gbi-service-")) / "service.db"
+        t0 = time.perf_counter()
+        build_synthetic_db(db, args.articles)
+        print(f"Built synthetic DB with {args.articles} articles in {time.perf_counter() - t0:.1f}s")
+
+    from service import ArticleService
+    import storage
+
+    service = ArticleService(db, args.cache_size)
+    server = service.make_server("127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    stop = time.monotonic() + args.duration
+    latencies: list[float] = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def client(seed: int):
+        rng = random.Random(seed)
+        local, errs = [], 0
+        while time.monotonic() < stop:
+            path = _requests(rng)
+            while path:
+                t0 = time.perf_counter()
+                try:
+                    with urllib.request.urlopen(base + path) as r:
+                        data = json.loads(r.read())
+                except Exception:
+                    errs += 1
+                    break
+                local.append(time.perf_counter() - t0)
+                nxt = data.get("next_cursor")
+                path = f"{path.split('&cursor=')[0]}&cursor={nxt}" if nxt and rng.random() < args.follow_pages else None
+        with lock:
+            latencies.extend(local)
+            errors[0] += errs
+
+    def writer():
+        i = 0
+        while time.monotonic() < stop:
+            time.sleep(args.write_every)
+            storage.upsert_article({"article_id": f"load-{i}", "headline": "load test", "publish_date": "2099-01-01",
+                                    "companies_ranked": [COMPANIES[0]], "primary_company": COMPANIES[0],
+                                    "keywords": [KEYWORDS[0]]})
+            i += 1
+
+    threads = [threading.Thread(target=client, args=(k,)) for k in range(args.threads)]
+    if args.write_every > 0:
+        threads.append(threading.Thread(target=writer))
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+    server.shutdown()
+
+    latencies.sort()
+    stats = service.cache.stats()
+    lookups = stats["hits"] + stats["misses"]
+    print(f"{len(latencies)} requests in {wall:.1f}s → {len(latencies) / wall:.0f} req/s "
+          f"({args.threads} threads, {errors[0]} errors)")
+    print(f"latency p50 {_pct(latencies, 0.5) * 1000:.2f} ms, p99 {_pct(latencies, 0.99) * 1000:.2f} ms")
+    print(f"cache hit ratio {stats['hits'] / lookups:.1%} ({stats['size']}/{stats['maxsize']} entries)"
+          if lookups else "cache unused")
+
+
+if __name__ == "__main__":
+    main()
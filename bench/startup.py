@@ -0,0 +1,63 @@
+"""
+Import-time budget for the CLI entry points.
+
+Each module is imported in a fresh interpreter with `-X importtime`; the
+cumulative import time of the module (interpreter startup excluded) must
+stay under its budget, and heavy dependencies must not be loaded until a
+code path needs them.
+
+    python bench/startup.py            # exit 1 if any budget is blown
+    python bench/startup.py --runs 5   # best-of-5 to reduce noise
+"""
+from __future__ import annotations
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# module: (budget in ms, modules that must NOT be imported)
+BUDGETS = {
+    "config": (40, ["pandas", "google.genai", "bs4", "requests"]),
+    "storage": (60, ["pandas", "google.genai", "bs4", "requests", "numpy"]),
+    "manage": (80, ["pandas", "google.genai", "bs4", "requests", "numpy", "scipy"]),
+    "enrich": (80, ["google.genai", "pandas"]),
+    "pipeline": (600, ["pandas", "google.genai", "scipy"]),
+}
+
+
+def measure(module: str) -> tuple[float, list[str]]:
+    code = f"import sys, json; import {module}; print(json.dumps(sorted(sys.modules)))"
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                         cwd=ROOT, capture_output=True, text=True, check=True)
+    cumulative_us = 0
+    for line in out.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            cumulative_us = int(parts[1])
+    return cumulative_us / 1000, json.loads(out.stdout)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Check entry-point import budgets")
+    ap.add_argument("--runs", type=int, default=3, help="Best-of-N per module")
+    args = ap.parse_args()
+
+    failed = False
+    for module, (budget_ms, forbidden) in BUDGETS.items():
+        best, loaded = None, []
+        for _ in range(args.runs):
+            ms, loaded = measure(module)
+            best = ms if best is None else min(best, ms)
+        leaked = [m for m in forbidden if m in loaded]
+        ok = best <= budget_ms and not leaked
+        failed |= not ok
+        note = f"  loads {', '.join(leaked)}" if leaked else ""
+        print(f"{'OK ' if ok else 'FAIL'} {module:<10} {best:8.1f} ms  (budget {budget_ms} ms){note}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
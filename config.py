@@ -8,17 +8,39 @@ load_dotenv()
 ROOT = Path(__file__).parent
 DATA_DIR = ROOT / "data"
 STATE_DIR = ROOT / "state"
-DATA_DIR.mkdir(exist_ok=True)
-STATE_DIR.mkdir(exist_ok=True)
 
-DB_PATH = DATA_DIR / "news.db"
+DB_PATH = Path(os.getenv("DB_PATH", DATA_DIR / "news.db"))
+# SQLite journal mode: wal (default; readers never block writers, but every process must be on
+# one host: WAL relies on shared memory) | delete (needed when hosts share the file over a network FS)
+DB_JOURNAL_MODE = os.getenv("DB_JOURNAL_MODE", "wal").lower()
+# articles.body storage: auto (zstd if installed, else zlib) | zstd | zlib | none
+BODY_COMPRESSION = os.getenv("BODY_COMPRESSION", "auto").lower()
+BODY_ZSTD_LEVEL = int(os.getenv("BODY_ZSTD_LEVEL", "19"))
 DEFAULT_CSV_PATH = DATA_DIR / "articles.csv"
+# Related-articles index (similar.py); lives next to the DB by default
+SIMILAR_DIR = Path(os.getenv("SIMILAR_DIR", DB_PATH.parent / "similar"))
 
 # Crawl
-BASE_INDEX_URL = "https://news.gbimonthly.com/tw/article/index.php"
+BASE_INDEX_URL = os.getenv("BASE_INDEX_URL", "https://news.gbimonthly.com/tw/article/index.php")
+# Source adapters to crawl (names registered in sources.py), comma-separated
+CRAWL_SOURCES = [s.strip() for s in os.getenv("CRAWL_SOURCES", "gbi").split(",") if s.strip()]
 USER_AGENT = "Mozilla/5.0 (compatible; GBI-Pipeline/1.0)"
+# Adaptive pacing per host (see throttle.py): REQUEST_DELAY is the floor between requests
 REQUEST_DELAY = float(os.getenv("REQUEST_DELAY", "0"))
+REQUEST_MAX_DELAY = float(os.getenv("REQUEST_MAX_DELAY", "30"))
+REQUEST_DELAY_STEP = float(os.getenv("REQUEST_DELAY_STEP", "0.05"))
+REQUEST_SLOW_SECONDS = float(os.getenv("REQUEST_SLOW_SECONDS", "5"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "5"))
 PAGES_TO_SCAN = int(os.getenv("PAGES_TO_SCAN", "2"))
+# Parse processes (0 = one per CPU core, 1 = parse inline on the main process)
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "0"))
+
+# Sharded runs (workqueue.py): shared queue DB, job lease length, claims before a job is parked as failed
+QUEUE_DB_PATH = Path(os.getenv("QUEUE_DB_PATH", STATE_DIR / "queue.db"))
+QUEUE_LEASE_SECONDS = float(os.getenv("QUEUE_LEASE_SECONDS", "600"))
+QUEUE_MAX_ATTEMPTS = int(os.getenv("QUEUE_MAX_ATTEMPTS", "5"))
+# Same choice as DB_JOURNAL_MODE: set delete when workers on several hosts share the queue DB
+QUEUE_JOURNAL_MODE = os.getenv("QUEUE_JOURNAL_MODE", "wal").lower()
 
 # LLM
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
@@ -26,4 +48,11 @@ GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
 
 
 # Misc
-DEFAULT_TIMEOUT = 20
\ No newline at end of file
+DEFAULT_TIMEOUT = 20
+
+
+def ensure_dirs():
+    """Create data/state dirs; called by code that writes there, not at import."""
+    DATA_DIR.mkdir(exist_ok=True)
+    STATE_DIR.mkdir(exist_ok=True)
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
\ No newline at end of file
@@ -4,8 +4,8 @@ import re
 from typing import Optional
 
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
-from google import genai
 
+import metrics
 from config import GEMINI_API_KEY, GEMINI_MODEL
 from prompts import SYSTEM_PROMPT, USER_PROMPT_TEMPLATE
 
@@ -37,18 +37,36 @@ def _to_string_list(x):
     return []
 
 
+def _count_retry(retry_state):
+    metrics.inc("gemini_retries")
+
+
+def _count_usage(resp):
+    usage = getattr(resp, "usage_metadata", None)
+    if usage is None:
+        return
+    for attr in ("prompt_token_count", "candidates_token_count", "total_token_count"):
+        metrics.inc(f"gemini_{attr.replace('_count', 's')}", getattr(usage, attr, None) or 0)
+
+
 class GeminiEnricher:
-    def __init__(self, api_key: Optional[str] = None, model_name: Optional[str] = None):
-        api_key = api_key or GEMINI_API_KEY
-        if not api_key:
-            raise RuntimeError("GEMINI_API_KEY is required. Set it in .env or env.")
-        self.client = genai.Client(api_key=api_key)
+    def __init__(self, api_key: Optional[str] = None, model_name: Optional[str] = None, client=None):
+        if client is None:
+            api_key = api_key or GEMINI_API_KEY
+            if not api_key:
+                raise RuntimeError("GEMINI_API_KEY is required. Set it in .env or env.")
+            from google import genai  # lazy: slow import, only needed for real API calls
+
+            client = genai.Client(api_key=api_key)
+        self.client = client
         self.model = (model_name or GEMINI_MODEL).strip()
 
+    @metrics.timed("enrich")
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=1, max=8),
         retry=retry_if_exception_type(Exception),
+        before_sleep=_count_retry,
     )
     def enrich(self, *, title: str | None, date: str | None, body: str) -> dict:
         prompt = (
@@ -57,10 +75,12 @@ class GeminiEnricher:
             + USER_PROMPT_TEMPLATE.format(title=title or "", date=date or "", body=body or "")
         )
 
+        metrics.inc("gemini_calls")
         resp = self.client.models.generate_content(
             model=self.model,
             contents=prompt,
         )
+        _count_usage(resp)
         text = getattr(resp, "text", "") or ""
 
         if not text:
@@ -68,6 +88,8 @@ class GeminiEnricher:
                 model=self.model,
                 contents=[{"role": "user", "parts": [prompt]}]
             )
+            metrics.inc("gemini_calls")
+            _count_usage(resp)
             text = getattr(resp, "text", "") or ""
 
         if not text:
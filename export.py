@@ -0,0 +1,128 @@
+from __future__ import annotations
+import csv
+import json
+import os
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable
+
+import metrics
+from storage import fetch_all_df, fetch_csv_rows
+
+CSV_COLS = [
+    "article_id", "url", "headline", "publish_date", "keywords",
+    "companies_ranked", "primary_company", "company_one_liner",
+    "summary_zh_tw", "summary_en", "fetched_at",
+]
+CHANGE_COLS = ["seq", "op", "changed_at"] + CSV_COLS
+
+
+@metrics.timed("export_csv")
+def export_csv_atomic(csv_path: str) -> int:
+    """
+    Export the entire DB snapshot to CSV atomically.
+    Returns the number of rows written. Writes to *.tmp then replaces.
+    """
+    df = fetch_all_df()
+    if df.empty:
+        return 0
+    df = df[CSV_COLS]
+    tmp = Path(csv_path).with_suffix(Path(csv_path).suffix + ".tmp")
+    tmp.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(tmp, index=False, encoding="utf-8-sig")
+    tmp.replace(csv_path)
+    return len(df)
+
+
+SORT_COLS = ("publish_date", "fetched_at")  # export_csv_atomic's ORDER BY
+
+
+@metrics.timed("export_csv_patch")
+def patch_csv(csv_path: str, removed: Iterable[str] = (), changed: Iterable[str] = ()) -> tuple[int, int, int]:
+    """
+    Bring an existing CSV snapshot up to date after a delete/update without
+    reloading the DB: rows in `removed` are dropped, rows in `changed` are
+    re-read from the DB (only those), everything else is copied through.
+    Streams the file, writes *.tmp and replaces; the result matches what
+    export_csv_atomic would write.
+
+    Dropping or rewriting a row in place keeps the snapshot's sort order
+    only while the row's sort key (publish_date, fetched_at) is unchanged.
+    When a changed row moved, or is not in the snapshot yet, or there is no
+    snapshot, this falls back to export_csv_atomic.
+    Returns (rows written, rows dropped, rows rewritten).
+    """
+    path = Path(csv_path)
+    if not path.exists():
+        return export_csv_atomic(csv_path), 0, 0
+    removed, changed = set(removed), set(changed) - set(removed)
+    fresh = {r["article_id"]: r for r in fetch_csv_rows(changed)}
+    written = dropped = rewritten = 0
+    moved = None
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(path, "r", encoding="utf-8-sig", newline="") as src, \
+            open(tmp, "w", encoding="utf-8-sig", newline="") as dst:
+        reader = csv.reader(src)
+        header = next(reader, None) or CSV_COLS
+        w = csv.writer(dst, lineterminator=os.linesep)  # same dialect pandas' to_csv uses
+        w.writerow(header)
+        aid_col = header.index("article_id")
+        sort_idx = [header.index(c) for c in SORT_COLS]
+        for row in reader:
+            aid = row[aid_col] if len(row) > aid_col else ""
+            if aid in removed or (aid in changed and aid not in fresh):
+                dropped += 1
+                continue
+            if aid in fresh:
+                f = fresh.pop(aid)
+                new = ["" if f.get(c) is None else str(f[c]) for c in header]
+                if any(row[i] != new[i] for i in sort_idx):
+                    moved = aid
+                    break
+                row = new
+                rewritten += 1
+            w.writerow(row)
+            written += 1
+    if moved or fresh:
+        tmp.unlink()
+        print(f"[Export] {'sort key of ' + moved + ' changed' if moved else f'{len(fresh)} row(s) not in the snapshot'}"
+              f" → full re-export")
+        return export_csv_atomic(csv_path), 0, 0
+    tmp.replace(path)
+    return written, dropped, rewritten
+
+
+@contextmanager
+def _open_out(out_path: str | None, encoding: str):
+    """stdout when out_path is None/'-', else *.tmp replaced on success."""
+    if not out_path or out_path == "-":
+        yield sys.stdout
+        return
+    tmp = Path(out_path).with_suffix(Path(out_path).suffix + ".tmp")
+    tmp.parent.mkdir(parents=True, exist_ok=True)
+    with open(tmp, "w", encoding=encoding, newline="") as f:
+        yield f
+    tmp.replace(out_path)
+
+
+@metrics.timed("export_changes")
+def write_changes(rows: list[dict], fmt: str, out_path: str | None = None) -> int:
+    """Write change-feed rows (storage.fetch_changes_since) as NDJSON or CSV."""
+    if fmt == "ndjson":
+        with _open_out(out_path, "utf-8") as f:
+            for r in rows:
+                f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    elif fmt == "csv":
+        with _open_out(out_path, "utf-8-sig") as f:
+            w = csv.DictWriter(f, fieldnames=CHANGE_COLS, extrasaction="ignore")
+            w.writeheader()
+            for r in rows:
+                flat = dict(r)
+                for k in ("keywords", "companies_ranked"):
+                    if isinstance(flat.get(k), list):
+                        flat[k] = ", ".join(flat[k])
+                w.writerow(flat)
+    else:
+        raise ValueError(f"Unknown change-feed format: {fmt}")
+    return len(rows)
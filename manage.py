@@ -1,68 +1,272 @@
 from __future__ import annotations
 import argparse
+import json
+import sys
+from datetime import date
 from pathlib import Path
 
+import profiling
 from config import DEFAULT_CSV_PATH
-from storage import delete_article_by_id, delete_articles, fetch_all_df
+from export import export_csv_atomic, patch_csv, write_changes
+from storage import (
+    delete_articles, update_articles, vacuum, analyze, db_size_bytes, fetch_changes_since,
+    init_db, compress_bodies, train_body_dict, has_body_dict, body_storage_bytes,
+    fetch_trends, rebuild_trends, fetch_headlines,
+)
+
+if len(sys.argv) == 1:  # default args when run without any (e.g. IDE run button)
+    sys.argv = ["manage.py", "delete", "--ids", "80108"]
+
+def iter_ids(ids_arg: str | None, from_file: str | None, seen: set[str]):
+    """
+    Stream IDs from --ids and/or --from-file ("-" = stdin), de-duplicated
+    in order. Every ID yielded is also added to `seen`, so the caller knows
+    which rows to patch in the CSV afterwards.
+    """
+    def raw():
+        if ids_arg:
+            yield from ids_arg.split(",")
+        if from_file == "-":
+            yield from sys.stdin
+        elif from_file:
+            with open(from_file, "r", encoding="utf-8") as f:
+                yield from f
+
+    for x in raw():
+        x = x.strip()
+        if x and x not in seen:
+            seen.add(x)
+            yield x
+
+
+def _progress(label: str):
+    done = [0, 0]  # ids processed, rows affected
+
+    def on_chunk(chunk, n):
+        done[0] += len(chunk)
+        done[1] += n
+        if done[0] % 10_000 < len(chunk):
+            print(f"[{label}] {done[0]:,} IDs processed, {done[1]:,} rows", file=sys.stderr)
+    return on_chunk
 
-import sys
-sys.argv = ["manage.py", "delete", "--ids", "80108"]
-
-CSV_COLS = [
-    "article_id", "url", "headline", "publish_date",
-    "companies_ranked", "primary_company", "company_one_liner",
-    "summary_zh_tw", "summary_en", "fetched_at",
-]
-
-def export_csv_atomic(csv_path: str) -> int:
-    df = fetch_all_df()
-    if df.empty:
-        return 0
-    df = df[CSV_COLS]
-    tmp = Path(csv_path).with_suffix(Path(csv_path).suffix + ".tmp")
-    tmp.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(tmp, index=False, encoding="utf-8-sig")
-    tmp.replace(csv_path)
-    return len(df)
-
-def parse_ids_arg(ids_arg: str | None, from_file: str | None) -> list[str]:
-    ids: list[str] = []
-    if ids_arg:
-        ids += [x.strip() for x in ids_arg.split(",") if x.strip()]
-    if from_file:
-        with open(from_file, "r", encoding="utf-8") as f:
-            ids += [line.strip() for line in f if line.strip()]
-    # de-dup, keep order
-    seen, out = set(), []
-    for i in ids:
-        if i not in seen:
-            seen.add(i); out.append(i)
-    return out
+
+LIST_COLS = ("keywords", "companies_ranked")
+
+
+def _parse_list_value(col: str, value: str) -> list[str]:
+    """A JSON array of strings when the value starts with '[', else comma-separated."""
+    if not value.strip().startswith("["):
+        return [v.strip() for v in value.split(",") if v.strip()]
+    try:
+        items = json.loads(value)
+    except json.JSONDecodeError as e:
+        raise SystemExit(f"--set {col}: not a valid JSON list ({e}): {value}")
+    if not isinstance(items, list) or not all(isinstance(v, str) for v in items):
+        raise SystemExit(f"--set {col}: expected a JSON list of strings, got: {value}")
+    return [v.strip() for v in items if v.strip()]
+
+
+def _parse_set_args(pairs: list[str]) -> dict:
+    values = {}
+    for pair in pairs:
+        col, sep, value = pair.partition("=")
+        if not sep:
+            raise SystemExit(f"--set expects COLUMN=VALUE, got: {pair}")
+        col = col.strip()
+        if col in LIST_COLS:
+            values[col] = _parse_list_value(col, value)
+        elif col == "publish_date":
+            try:
+                values[col] = date.fromisoformat(value.strip()).isoformat()
+            except ValueError:
+                raise SystemExit(f"--set publish_date expects YYYY-MM-DD, got: {value}")
+        else:
+            values[col] = value
+    return values
+
+
+def _refresh_csv(args, removed: set[str] = frozenset(), changed: set[str] = frozenset()):
+    if args.no_export:
+        return
+    if args.full_export:
+        n = export_csv_atomic(args.csv)
+        print(f"Refreshed CSV snapshot → {args.csv} ({n} rows)")
+        return
+    n, dropped, rewritten = patch_csv(args.csv, removed=removed, changed=changed)
+    print(f"Patched CSV snapshot → {args.csv} ({n} rows; {dropped} dropped, {rewritten} rewritten)")
 
 def main():
     ap = argparse.ArgumentParser(description="Manage the articles DB")
+    profiling.add_arguments(ap)
     sub = ap.add_subparsers(dest="cmd", required=True)
 
+    def add_id_args(sp, verb: str):
+        sp.add_argument("--ids", help="Comma-separated IDs, e.g. 80098,80123")
+        sp.add_argument("--from-file", help="Text file with one ID per line ('-' = stdin)")
+        sp.add_argument("--csv", default=str(DEFAULT_CSV_PATH),
+                        help=f"CSV snapshot to patch after the {verb} (default: config.DEFAULT_CSV_PATH)")
+        sp.add_argument("--no-export", action="store_true", help="Leave the CSV snapshot alone")
+        sp.add_argument("--full-export", action="store_true",
+                        help="Rewrite the CSV from the whole DB instead of patching the affected rows")
+
     sp_del = sub.add_parser("delete", help="Delete article(s) by ID")
-    sp_del.add_argument("--ids", help="Comma-separated IDs, e.g. 80098,80123")
-    sp_del.add_argument("--from-file", help="Text file with one ID per line")
-    sp_del.add_argument("--csv", default=str(DEFAULT_CSV_PATH),
-                        help="CSV path to refresh after deletion (default: config.DEFAULT_CSV_PATH)")
-    sp_del.add_argument("--no-export", action="store_true", help="Do not rewrite the CSV snapshot")
+    add_id_args(sp_del, "deletion")
+
+    sp_upd = sub.add_parser("update", help="Set column(s) on article(s) by ID")
+    add_id_args(sp_upd, "update")
+    sp_upd.add_argument("--set", action="append", required=True, metavar="COLUMN=VALUE",
+                        help="e.g. --set primary_company=Unknown --set keywords=CDMO,GLP-1 (list columns also "
+                             "take a JSON array; repeatable)")
+
+    sub.add_parser("vacuum", help="Rebuild the DB file to return space freed by deletes")
+    sub.add_parser("analyze", help="Refresh the query planner statistics")
+
+    sp_cmp = sub.add_parser("compress-bodies", help="Compress stored article bodies (migration)")
+    sp_cmp.add_argument("--train-dict", action="store_true",
+                        help="Train a new zstd dictionary from stored bodies and re-encode every row with it")
+    sp_cmp.add_argument("--recompress", action="store_true",
+                        help="Re-encode already compressed rows too (default: only uncompressed rows)")
+
+    sp_exp = sub.add_parser("export", help="Export rows changed since a cursor (change feed)")
+    sp_exp.add_argument("--since", type=int,
+                        help="Cursor from the previous export (0 = everything; default: read --cursor-file)")
+    sp_exp.add_argument("--cursor-file", help="File holding the cursor; updated after a successful export")
+    sp_exp.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    sp_exp.add_argument("--out", help="Output path (default: stdout)")
+    sp_exp.add_argument("--limit", type=int, help="At most N changes; re-run with the next cursor for more")
+
+    sp_tr = sub.add_parser("trends", help="Top companies / keywords per day or week")
+    sp_tr.add_argument("--kind", choices=["company", "keyword"], default="company")
+    sp_tr.add_argument("--grain", choices=["day", "week"], default="week")
+    sp_tr.add_argument("--since", help="First bucket date, YYYY-MM-DD")
+    sp_tr.add_argument("--until", help="Last bucket date, YYYY-MM-DD")
+    sp_tr.add_argument("--top", type=int, default=10, help="Names per bucket")
+    sp_tr.add_argument("--total", action="store_true", help="One ranking over the whole range instead of per bucket")
+    sp_tr.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    sp_tr.add_argument("--rebuild", action="store_true", help="Recompute the rollup tables from all articles first")
+
+    sp_sim = sub.add_parser("similar", help="Related articles from the local TF-IDF index")
+    sp_sim.add_argument("--id", nargs="+", dest="ids", help="Article ID(s) to find related articles for")
+    sp_sim.add_argument("--text", help="Free text to match instead of an article")
+    sp_sim.add_argument("--top", type=int, default=10, help="Results per query")
+    sp_sim.add_argument("--rebuild", action="store_true", help="Rebuild the index from all articles first")
+    sp_sim.add_argument("--json", action="store_true", help="Print JSON instead of a table")
 
     args = ap.parse_args()
 
-    if args.cmd == "delete":
-        ids = parse_ids_arg(args.ids, args.from_file)
-        if not ids:
+    with profiling.from_args(args, f"manage-{args.cmd}"):
+        run_command(args)
+
+def run_command(args):
+    if args.cmd in ("delete", "update"):
+        if not args.ids and not args.from_file:
             print("No IDs provided. Use --ids or --from-file.")
             return
-        deleted = delete_articles(ids) if len(ids) > 1 else delete_article_by_id(ids[0])
-        print(f"Deleted {deleted} row(s) from DB.")
+        init_db()
+        seen: set[str] = set()
+        ids = iter_ids(args.ids, args.from_file, seen)
+        if args.cmd == "delete":
+            n = delete_articles(ids, on_chunk=_progress("Delete"))
+            print(f"Deleted {n} row(s) from DB ({len(seen)} ID(s) given).")
+            _refresh_csv(args, removed=seen)
+        else:
+            try:
+                n = update_articles(ids, _parse_set_args(args.set), on_chunk=_progress("Update"))
+            except ValueError as e:
+                raise SystemExit(str(e))
+            print(f"Updated {n} row(s) in DB ({len(seen)} ID(s) given).")
+            _refresh_csv(args, changed=seen)
+
+    elif args.cmd in ("vacuum", "analyze"):
+        init_db()
+        before = db_size_bytes()
+        vacuum() if args.cmd == "vacuum" else analyze()
+        print(f"{args.cmd.upper()} done: {before:,} → {db_size_bytes():,} bytes.")
+
+    elif args.cmd == "compress-bodies":
+        init_db()
+        n, before = body_storage_bytes()
+        recompress = args.recompress
+        if args.train_dict or not has_body_dict():
+            try:
+                dict_id = train_body_dict()
+                print(f"Trained zstd dictionary #{dict_id}")
+                recompress = True
+            except RuntimeError as e:
+                if args.train_dict:
+                    raise SystemExit(str(e))
+                print(f"No dictionary trained ({e}); using the plain codec.")
+        done = compress_bodies(recompress=recompress)
+        _, after = body_storage_bytes()
+        print(f"Re-encoded {done} of {n} bodies: {before:,} → {after:,} bytes.")
+        print("Run `python manage.py vacuum` to return the freed pages to the filesystem.")
+
+    elif args.cmd == "trends":
+        init_db()
+        if args.rebuild:
+            rebuild_trends()
+            print("Rebuilt trend rollups.", file=sys.stderr)
+        rows = fetch_trends(args.kind, args.grain, args.since, args.until, args.top, args.total)
+        if args.json:
+            print(json.dumps(rows, ensure_ascii=False, indent=2))
+            return
+        if not rows:
+            print("No trend data for that range.")
+            return
+        last_bucket = None
+        for r in rows:
+            bucket = r.get("bucket", "total")
+            if bucket != last_bucket:
+                print(f"\n{args.grain} of {bucket}" if bucket != "total" else f"\n{args.since or '…'} → {args.until or '…'}")
+                last_bucket = bucket
+            print(f"  {r['weight']:8.2f}  {r['mentions']:5d}x  {r['name']}")
+
+    elif args.cmd == "similar":
+        if not args.ids and not args.text:
+            print("Nothing to look up. Use --id or --text.")
+            return
+        import similar  # lazy: numpy/scipy are only needed here
+
+        init_db()
+        if args.rebuild:
+            idx, n = similar.rebuild()
+            print(f"Rebuilt similar-article index ({n} articles).", file=sys.stderr)
+        else:
+            idx, n = similar.refresh()
+            if n:
+                print(f"Similar-article index: applied {n} change(s).", file=sys.stderr)
+        results = idx.query(args.ids, args.top) if args.ids else {}
+        if args.text:
+            results["--text"] = idx.query_text(args.text, args.top)
+        missing = [i for i in args.ids or [] if i not in results]
+        if missing:
+            print(f"Not in DB: {', '.join(missing)}", file=sys.stderr)
+        heads = fetch_headlines({aid for hits in results.values() for aid, _ in hits} | set(results))
+        if args.json:
+            out = {q: [{"article_id": aid, "score": score, "headline": heads.get(aid, ("", ""))[0],
+                        "publish_date": heads.get(aid, ("", ""))[1]} for aid, score in hits]
+                   for q, hits in results.items()}
+            print(json.dumps(out, ensure_ascii=False, indent=2))
+            return
+        for q, hits in results.items():
+            print(f"\n{q} | {heads[q][0]}" if q in heads else f"\n{args.text}")
+            for aid, score in hits:
+                headline, date = heads.get(aid, ("", ""))
+                print(f"  {score:.3f}  {aid:>8}  {date}  {headline}")
 
-        if not args.no_export:
-            n = export_csv_atomic(args.csv)
-            print(f"Refreshed CSV snapshot → {args.csv} ({n} rows)")
+    elif args.cmd == "export":
+        init_db()
+        cursor = args.since
+        if cursor is None:
+            p = Path(args.cursor_file) if args.cursor_file else None
+            cursor = int(p.read_text().strip() or 0) if p and p.exists() else 0
+        rows, next_cursor = fetch_changes_since(cursor, limit=args.limit)
+        write_changes(rows, args.format, args.out)
+        if args.cursor_file:
+            Path(args.cursor_file).write_text(f"{next_cursor}\n", encoding="utf-8")
+        deletes = sum(1 for r in rows if r["op"] == "delete")
+        print(f"Exported {len(rows)} change(s) ({deletes} delete(s)) since {cursor}; next cursor: {next_cursor}",
+              file=sys.stderr)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,174 @@
+"""
+Run metrics: per-stage timers and counters, emitted as a JSON run summary
+and/or a Prometheus textfile. Disabled by default; while disabled every
+timer/counter call is a flag check and nothing is recorded.
+"""
+from __future__ import annotations
+import functools
+import json
+import time
+from collections import defaultdict
+from pathlib import Path
+
+_enabled = False
+_timings: dict[str, list[float]] = defaultdict(list)
+_counters: dict[str, float] = defaultdict(float)
+_started = time.time()
+_hooks: list = []
+
+
+def enable(on: bool = True):
+    global _enabled
+    _enabled = on
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def add_stage_hook(fn):
+    """fn(stage, entering) is called around every timed stage, even with metrics disabled."""
+    _hooks.append(fn)
+
+
+def remove_stage_hook(fn):
+    if fn in _hooks:
+        _hooks.remove(fn)
+
+
+def reset():
+    global _started
+    _timings.clear()
+    _counters.clear()
+    _started = time.time()
+
+
+class _Timer:
+    __slots__ = ("stage", "t0")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        for h in _hooks:
+            h(self.stage, True)
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if _enabled:
+            _timings[self.stage].append(time.perf_counter() - self.t0)
+        for h in _hooks:
+            h(self.stage, False)
+        return False
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullTimer()
+
+
+def timer(stage: str):
+    """Context manager timing one occurrence of `stage`."""
+    return _Timer(stage) if (_enabled or _hooks) else _NULL
+
+
+def timed(stage: str):
+    """Decorator form of `timer`."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not (_enabled or _hooks):
+                return fn(*args, **kwargs)
+            with _Timer(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def inc(name: str, n: float = 1):
+    if _enabled:
+        _counters[name] += n
+
+
+def snapshot() -> dict:
+    """Raw samples, picklable; used to ship metrics back from worker processes."""
+    return {"timings": {k: list(v) for k, v in _timings.items()}, "counters": dict(_counters)}
+
+
+def merge(snap: dict | None):
+    if not snap or not _enabled:
+        return
+    for k, v in snap.get("timings", {}).items():
+        _timings[k].extend(v)
+    for k, v in snap.get("counters", {}).items():
+        _counters[k] += v
+
+
+def _pct(sorted_samples: list[float], q: float) -> float:
+    idx = min(len(sorted_samples) - 1, max(0, round(q * len(sorted_samples) + 0.5) - 1))
+    return sorted_samples[idx]
+
+
+def summary() -> dict:
+    stages = {}
+    for stage, samples in sorted(_timings.items()):
+        s = sorted(samples)
+        stages[stage] = {
+            "count": len(s),
+            "total_s": round(sum(s), 4),
+            "p50_ms": round(_pct(s, 0.50) * 1000, 3),
+            "p99_ms": round(_pct(s, 0.99) * 1000, 3),
+            "max_ms": round(s[-1] * 1000, 3),
+        }
+    return {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(_started)),
+        "wall_s": round(time.time() - _started, 3),
+        "stages": stages,
+        "counters": {k: (int(v) if float(v).is_integer() else v) for k, v in sorted(_counters.items())},
+    }
+
+
+def _write_atomic(path: str | Path, text: str):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    tmp.replace(path)
+
+
+def write_json(path: str | Path, extra: dict | None = None):
+    data = summary()
+    if extra:
+        data.update(extra)
+    _write_atomic(path, json.dumps(data, ensure_ascii=False, indent=2))
+
+
+def write_prometheus(path: str | Path, prefix: str = "gbi_pipeline"):
+    """Textfile-collector format (node_exporter --collector.textfile)."""
+    data = summary()
+    lines = [
+        f"# HELP {prefix}_stage_seconds Time spent per pipeline stage.",
+        f"# TYPE {prefix}_stage_seconds summary",
+    ]
+    for stage, s in data["stages"].items():
+        lbl = f'stage="{stage}"'
+        lines.append(f'{prefix}_stage_seconds{{{lbl},quantile="0.5"}} {s["p50_ms"] / 1000:.6f}')
+        lines.append(f'{prefix}_stage_seconds{{{lbl},quantile="0.99"}} {s["p99_ms"] / 1000:.6f}')
+        lines.append(f"{prefix}_stage_seconds_sum{{{lbl}}} {s['total_s']:.6f}")
+        lines.append(f"{prefix}_stage_seconds_count{{{lbl}}} {s['count']}")
+    for name, v in data["counters"].items():
+        metric = f"{prefix}_{name.replace('.', '_')}_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {v}")
+    lines.append(f"# TYPE {prefix}_last_run_seconds gauge")
+    lines.append(f"{prefix}_last_run_seconds {data['wall_s']}")
+    lines.append(f"# TYPE {prefix}_last_run_timestamp_seconds gauge")
+    lines.append(f"{prefix}_last_run_timestamp_seconds {int(time.time())}")
+    _write_atomic(path, "\n".join(lines) + "\n")
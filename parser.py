@@ -1,12 +1,15 @@
 from __future__ import annotations
 import re
 from typing import Optional, Dict
-from urllib.parse import urlparse, parse_qsl
 
 import requests
 from bs4 import BeautifulSoup, NavigableString, Tag
 
+import metrics
+import throttle
+import sources
 from config import USER_AGENT, DEFAULT_TIMEOUT
+from sources import SourceAdapter
 
 session = requests.Session()
 session.headers.update({
@@ -18,21 +21,6 @@ DATE_LABEL_RE = re.compile(r"(?:發佈日期|發布日期|日期)\s*[:：]?\s*",
 DATE_VALUE_RE = re.compile(r"\b(\d{4}[/-]\d{2}[/-]\d{2})\b")
 STOP_TOKENS_RE = re.compile(r"(編輯推薦|延伸閱讀|當期雜誌|影音專區|參考資料|回列表頁|TOP|©)", re.I)
 
-ARTICLE_BODY_SELECTORS = [
-    'div.editor.fsize_area[itemprop="articleBody"]',
-    '.editor.fsize_area[itemprop="articleBody"]',
-]
-EXCLUDE_INSIDE_EDITOR = [
-    "div.copyright",
-    "div.tagBox",
-    "div.recommend",
-    "div.reporter-con",
-    "div.nextBox",
-    "div.read",
-    "div.sub-btn",
-    "div.adBox",
-]
-
 EXCLUDE_SELECTORS = [
     "header", "nav", "footer", "aside",
     "ul.pager", "div.pager",
@@ -48,25 +36,20 @@ def _strip(s: str) -> str:
     return re.sub(r"\s+", " ", s or "").strip()
 
 
-def _get_article_id(url: str) -> Optional[str]:
-    qs = dict(parse_qsl(urlparse(url).query, keep_blank_values=True))
-    num = qs.get("num")
-    return num if num and num.isdigit() else None
-
-
+@metrics.timed("http.fetch_article_html")
 def fetch_article_html(url: str) -> str:
-    r = session.get(url, timeout=DEFAULT_TIMEOUT)
-    r.raise_for_status()
+    r = throttle.get(session, url, timeout=DEFAULT_TIMEOUT)
     r.encoding = "utf-8"
     return r.text
 
 
-def _extract_headline(soup: BeautifulSoup) -> Optional[str]:
-    tb = soup.select_one("div.titleBox > h1")
-    if tb:
-        t = _strip(tb.get_text(" "))
-        if t:
-            return t
+def _extract_headline(soup: BeautifulSoup, source: SourceAdapter) -> Optional[str]:
+    for sel in source.headline_selectors:
+        tb = soup.select_one(sel)
+        if tb:
+            t = _strip(tb.get_text(" "))
+            if t:
+                return t
     for sel in ["article h1", "main h1", "h1", "h2"]:
         el = soup.select_one(sel)
         if el:
@@ -81,12 +64,13 @@ def _extract_headline(soup: BeautifulSoup) -> Optional[str]:
     return max(candidates, key=len) if candidates else None
 
 
-def _extract_date(soup: BeautifulSoup) -> Optional[str]:
-    d = soup.select_one("div.reporter div.date")
-    if d:
-        m = DATE_VALUE_RE.search(_strip(d.get_text(" ")))
-        if m:
-            return m.group(1).replace("/", "-")
+def _extract_date(soup: BeautifulSoup, source: SourceAdapter) -> Optional[str]:
+    for sel in source.date_selectors:
+        d = soup.select_one(sel)
+        if d:
+            m = DATE_VALUE_RE.search(_strip(d.get_text(" ")))
+            if m:
+                return m.group(1).replace("/", "-")
     for node in soup.find_all(string=DATE_LABEL_RE):
         context = node.parent.get_text(" ", strip=True) if isinstance(node, NavigableString) else str(node)
         m = DATE_VALUE_RE.search(context)
@@ -157,15 +141,15 @@ def _collect_text_from_container(node: Tag) -> str:
     return text.strip()
 
 
-def _extract_body_from_editor(soup: BeautifulSoup) -> str:
+def _extract_body_from_editor(soup: BeautifulSoup, source: SourceAdapter) -> str:
     container = None
-    for sel in ARTICLE_BODY_SELECTORS:
+    for sel in source.body_selectors:
         container = soup.select_one(sel)
         if container:
             break
     if not container:
         return ""
-    for sel in EXCLUDE_INSIDE_EDITOR:
+    for sel in source.exclude_inside_body:
         for n in container.select(sel):
             n.decompose()
     parts = []
@@ -188,8 +172,8 @@ def _extract_body_from_editor(soup: BeautifulSoup) -> str:
     return text.strip()
 
 
-def _extract_body(soup: BeautifulSoup) -> str:
-    body = _extract_body_from_editor(soup)
+def _extract_body(soup: BeautifulSoup, source: SourceAdapter) -> str:
+    body = _extract_body_from_editor(soup, source)
     if len(body) >= 200 and re.search(r"[。！？.!?]", body):
         return body
     for cont in _candidate_blocks(soup):
@@ -200,13 +184,25 @@ def _extract_body(soup: BeautifulSoup) -> str:
     return whole
 
 
-def parse_article_page(url: str) -> Dict[str, str | None]:
-    html = fetch_article_html(url)
-    soup = BeautifulSoup(html, "html.parser")
+def parse_html(url: str, html: str, source: SourceAdapter | None = None) -> Dict[str, str | None]:
+    """Pure-CPU extraction step; safe to run in a ProcessPoolExecutor. source defaults to the URL's host."""
+    source = source or sources.for_url(url)
+    with metrics.timer("parse.soup"):
+        soup = BeautifulSoup(html, "html.parser")
+    with metrics.timer("parse.headline"):
+        headline = _extract_headline(soup, source)
+    with metrics.timer("parse.date"):
+        publish_date = _extract_date(soup, source)
+    with metrics.timer("parse.body"):
+        body = _extract_body(soup, source)
     return {
-        "article_id": _get_article_id(url),
+        "article_id": source.article_id(url),
         "url": url,
-        "headline": _extract_headline(soup),
-        "publish_date": _extract_date(soup),
-        "body": _extract_body(soup),
-    }
\ No newline at end of file
+        "headline": headline,
+        "publish_date": publish_date,
+        "body": body,
+    }
+
+
+def parse_article_page(url: str) -> Dict[str, str | None]:
+    return parse_html(url, fetch_article_html(url))
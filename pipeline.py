@@ -1,110 +1,209 @@
 from __future__ import annotations
 import argparse
+import os
+import socket
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from queue import Queue, Full
 
-from config import DEFAULT_CSV_PATH, PAGES_TO_SCAN, REQUEST_DELAY, GEMINI_API_KEY, GEMINI_MODEL
-from crawler import crawl_links
-from parser import parse_article_page
-from enrich import GeminiEnricher
-from storage import init_db, have_article, upsert_article, fetch_all_df
-from pathlib import Path
-from tqdm import tqdm
-from urllib.parse import urlparse, parse_qsl 
+import metrics
+import profiling
+from config import (
+    DEFAULT_CSV_PATH, PAGES_TO_SCAN, REQUEST_DELAY, GEMINI_API_KEY, GEMINI_MODEL, PARSE_WORKERS, SIMILAR_DIR,
+    QUEUE_LEASE_SECONDS,
+)
+import sources
+from crawler import crawl_sources
+from parser import fetch_article_html, parse_html
+from storage import init_db, have_article, upsert_article
+from export import export_csv_atomic
+from urllib.parse import urlparse
 
 import sys
-sys.argv = ["pipeline.py", "--max-pages", "3", "--csv", "data/articles.csv"]
-# sys.argv = ["pipeline.py", "--all", "--csv", "data/articles.csv"]
+if len(sys.argv) == 1:  # default args when run without any (e.g. IDE run button)
+    sys.argv = ["pipeline.py", "--max-pages", "3", "--csv", "data/articles.csv"]
+    # sys.argv = ["pipeline.py", "--all", "--csv", "data/articles.csv"]
 
-CSV_COLS = [
-    "article_id", "url", "headline", "publish_date", "keywords",
-    "companies_ranked", "primary_company", "company_one_liner",
-    "summary_zh_tw", "summary_en", "fetched_at",
-]
+def _article_id_from_url(url: str) -> str | None:
+    return sources.for_url(url).article_id(url)
 
+def _parse_job(url: str, html: str, collect: bool):
+    """Process-pool entry point; ships the worker's parse timings back to the parent."""
+    if not collect:
+        return parse_html(url, html), None
+    metrics.enable()
+    metrics.reset()
+    art = parse_html(url, html)
+    return art, metrics.snapshot()
 
-def export_csv_atomic(csv_path: str) -> int:
+
+def _iter_parsed(items: list[tuple[int, str, str]], workers: int, on_error=None,
+                 pool: ProcessPoolExecutor | None = None, fetchers: ThreadPoolExecutor | None = None):
     """
-    Export the entire DB snapshot to CSV atomically.
-    Returns the number of rows written. Writes to *.tmp then replaces.
+    Fetch with one thread per host, parse in a process pool.
+    Each host's throttle paces its own thread, so several sources are
+    fetched side by side instead of one after another. Yields
+    (i, aid, url, art): in input order per host, hosts interleaved.
+    At most 2*workers fetched pages wait for parsing, and 2*workers parse
+    jobs are in flight, so HTML never piles up in memory.
+    With on_error(i, aid, url, exc), a failed fetch/parse skips that item
+    instead of ending the run. workers <= 1 does everything inline.
+    pool/fetchers let a caller that runs many small batches (run_worker)
+    reuse its executors; by default both are created for this call.
     """
-    df = fetch_all_df()
-    if df.empty:
-        return 0
-    df = df[CSV_COLS]
-    tmp = Path(csv_path).with_suffix(Path(csv_path).suffix + ".tmp")
-    tmp.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(tmp, index=False, encoding="utf-8-sig")
-    tmp.replace(csv_path) 
-    return len(df)
-
-def _article_id_from_url(url: str) -> str | None:  
-    qs = dict(parse_qsl(urlparse(url).query, keep_blank_values=True))
-    num = qs.get("num")
-    return num if num and num.isdigit() else None
-
-def run_pipeline(max_pages: int, all_pages: bool, do_enrich: bool, csv_path: str):
-    init_db()
+    def failed(i, aid, url, e):
+        if on_error is None:
+            raise e
+        on_error(i, aid, url, e)
 
-    print(f"[Crawl] pages = {'ALL' if all_pages else max_pages}, delay={REQUEST_DELAY}s")
-    urls = crawl_links(max_pages=max_pages, auto_all=all_pages, delay=REQUEST_DELAY)
-    print(f"[Crawl] found {len(urls)} article URLs (deduped)")
-    enricher = None
-    if do_enrich:
-        enricher = GeminiEnricher(api_key=GEMINI_API_KEY, model_name=GEMINI_MODEL)
-        print(f"[Gemini] model ready: {GEMINI_MODEL}")
-    else:
+    if workers <= 1:
+        for i, aid, url in items:
+            print(f"[{i:03d}] Fetching & parsing: {url}")
+            try:
+                art = parse_html(url, fetch_article_html(url))
+            except Exception as e:
+                failed(i, aid, url, e)
+                continue
+            yield i, aid, url, art
+        return
+
+    def drain(pi, paid, purl, fut):
+        try:
+            art, snap = fut.result()
+        except Exception as e:
+            failed(pi, paid, purl, e)
+            return None
+        metrics.merge(snap)
+        return pi, paid, purl, art
+
+    by_host: dict[str, list] = {}
+    for item in items:
+        by_host.setdefault(urlparse(item[2]).netloc.lower(), []).append(item)
+    fetched: Queue = Queue(maxsize=2 * workers)
+    stop = threading.Event()
+
+    def fetch_host(host_items):
+        for i, aid, url in host_items:
+            if stop.is_set():
+                return
+            print(f"[{i:03d}] Fetching: {url}")
+            try:
+                result = (i, aid, url, fetch_article_html(url), None)
+            except Exception as e:
+                result = (i, aid, url, None, e)
+            while not stop.is_set():
+                try:
+                    fetched.put(result, timeout=0.5)
+                    break
+                except Full:
+                    pass
+
+    with ExitStack() as owned:
+        if pool is None:
+            pool = owned.enter_context(ProcessPoolExecutor(max_workers=workers))
+        if fetchers is None:
+            fetchers = owned.enter_context(
+                ThreadPoolExecutor(max_workers=max(1, len(by_host)), thread_name_prefix="fetch"))
+        for host_items in by_host.values():
+            fetchers.submit(fetch_host, host_items)
+        pending = deque()
+        try:
+            for _ in range(len(items)):
+                i, aid, url, html, err = fetched.get()
+                if err is not None:
+                    failed(i, aid, url, err)
+                    continue
+                pending.append((i, aid, url, pool.submit(_parse_job, url, html, metrics.enabled())))
+                if len(pending) >= 2 * workers:
+                    done = drain(*pending.popleft())
+                    if done:
+                        yield done
+            while pending:
+                done = drain(*pending.popleft())
+                if done:
+                    yield done
+        finally:
+            stop.set()  # lets fetch threads exit if the caller stops early
+
+
+_NO_ENRICH = {
+    "companies_ranked": [],
+    "primary_company": "Unknown",
+    "company_one_liner": "",
+    "summary_zh_tw": "",
+    "summary_en": "",
+}
+
+
+def _make_enricher(do_enrich: bool):
+    if not do_enrich:
         print("[Gemini] enrichment disabled (--no-enrich)")
+        return None
+    from enrich import GeminiEnricher  # lazy: google-genai is slow to import
 
-    new_count = 0
-    for i, url in enumerate(tqdm(urls, desc="Processing articles", unit="article"), 1):
+    enricher = GeminiEnricher(api_key=GEMINI_API_KEY, model_name=GEMINI_MODEL)
+    print(f"[Gemini] model ready: {GEMINI_MODEL}")
+    return enricher
+
+
+def _new_articles(urls: list[str]) -> list[tuple[int, str, str]]:
+    """(i, aid, url) for URLs with an article_id that is not in the DB yet."""
+    todo = []
+    for i, url in enumerate(urls, 1):
         aid = _article_id_from_url(url)
         if not aid:
             print(f"[{i:03d}] Skip (no article_id in URL): {url}")
             continue
         if have_article(aid):
             print(f"[{i:03d}] Seen, skip: {aid}")
+            metrics.inc("articles_seen")
             continue
-        print(f"[{i:03d}] Fetching & parsing: {url}")  
-        art = parse_article_page(url)
-        body = (art.get("body") or "").strip()
-        if len(body) < 10:
-            print(f"[{i:03d}] Body too short, skip: {aid}")
-            continue
-        if enricher:
-            try:
-                enrich = enricher.enrich(
-                    title=art.get("headline"),
-                    date=art.get("publish_date"),
-                    body=body
-                )
-            except Exception as e:
-                print(f"[{i:03d}] Enrich failed ({aid}): {e}")
-                enrich = {
-                    "companies_ranked": [],
-                    "primary_company": "Unknown",
-                    "company_one_liner": "",
-                    "summary_zh_tw": "",
-                    "summary_en": "",
-                }
-        else:
-            enrich = {
-                "companies_ranked": [],
-                "primary_company": "Unknown",
-                "company_one_liner": "",
-                "summary_zh_tw": "",
-                "summary_en": "",
-            }
-
-        row = {**art, **enrich}
-        upsert_article(row)
-        new_count += 1
-        print(f"[{i:03d}] Added: {aid} | {art.get('headline')}")
+        todo.append((i, aid, url))
+    return todo
+
 
+def process_article(i: int, aid: str, art: dict, enricher) -> bool:
+    """Enrich and store one parsed article. Returns False if it was skipped."""
+    body = (art.get("body") or "").strip()
+    if len(body) < 10:
+        print(f"[{i:03d}] Body too short, skip: {aid}")
+        metrics.inc("articles_short")
+        return False
+    enrich = dict(_NO_ENRICH)
+    if enricher:
         try:
-            n = export_csv_atomic(csv_path)
-            print(f"[Export] Checkpoint CSV ({n} rows) → {csv_path}")
+            enrich = enricher.enrich(
+                title=art.get("headline"),
+                date=art.get("publish_date"),
+                body=body
+            )
         except Exception as e:
-            print(f"[Export] CSV checkpoint failed: {e}")
+            print(f"[{i:03d}] Enrich failed ({aid}): {e}")
+            metrics.inc("enrich_failures")
+
+    row = {**art, **enrich}
+    upsert_article(row)
+    metrics.inc("articles_new")
+    print(f"[{i:03d}] Added: {aid} | {art.get('headline')}")
+    return True
+
+
+def _refresh_similar():
+    if not (SIMILAR_DIR / "meta.json").exists():  # only once `manage.py similar` built it
+        return
+    try:
+        from similar import refresh  # lazy: numpy/scipy
 
+        _, n = refresh()
+        print(f"[Similar] indexed {n} change(s)")
+    except Exception as e:
+        print(f"[Similar] index update failed: {e}")
+
+
+def _final_export(csv_path: str):
     try:
         n = export_csv_atomic(csv_path)
         if n:
@@ -114,9 +213,136 @@ def run_pipeline(max_pages: int, all_pages: bool, do_enrich: bool, csv_path: str
     except Exception as e:
         print(f"[Export] Final CSV export failed: {e}")
 
+
+def _crawl(max_pages: int, all_pages: bool, source_names: list[str] | None = None) -> list[str]:
+    srcs = sources.get_sources(source_names)
+    print(f"[Crawl] sources = {', '.join(s.name for s in srcs)}, pages = {'ALL' if all_pages else max_pages}, "
+          f"min delay={REQUEST_DELAY}s per host (adaptive)")
+    with metrics.timer("crawl_links"):
+        urls = crawl_sources(srcs, max_pages=max_pages, auto_all=all_pages)
+    metrics.inc("urls_found", len(urls))
+    print(f"[Crawl] found {len(urls)} article URLs (deduped)")
+    return urls
+
+
+def run_pipeline(max_pages: int, all_pages: bool, do_enrich: bool, csv_path: str,
+                 parse_workers: int = PARSE_WORKERS, source_names: list[str] | None = None):
+    init_db()
+
+    urls = _crawl(max_pages, all_pages, source_names)
+    enricher = _make_enricher(do_enrich)
+
+    todo = _new_articles(urls)
+    workers = parse_workers or os.cpu_count() or 1
+    print(f"[Parse] {len(todo)} new article(s), parse workers={workers}")
+
+    from tqdm import tqdm
+
+    new_count = 0
+    parsed = _iter_parsed(todo, workers)
+    for i, aid, url, art in tqdm(parsed, total=len(todo), desc="Processing articles", unit="article"):
+        if not process_article(i, aid, art, enricher):
+            continue
+        new_count += 1
+
+        try:
+            n = export_csv_atomic(csv_path)
+            print(f"[Export] Checkpoint CSV ({n} rows) → {csv_path}")
+        except Exception as e:
+            print(f"[Export] CSV checkpoint failed: {e}")
+
+    _final_export(csv_path)
+    if new_count:
+        _refresh_similar()
+
     print(f"[Done] New rows this run: {new_count}")
 
 
+def run_coordinator(max_pages: int, all_pages: bool, csv_path: str, wait: bool = False,
+                    retry_failed: bool = False, poll: float = 10.0, source_names: list[str] | None = None):
+    """Crawl the index and enqueue new articles for --worker processes; with wait, export once drained."""
+    from workqueue import WorkQueue
+
+    init_db()
+    queue = WorkQueue()
+    if retry_failed:
+        print(f"[Queue] re-queued {queue.retry_failed()} failed job(s)")
+
+    urls = _crawl(max_pages, all_pages, source_names)
+    todo = _new_articles(urls)
+    added = queue.enqueue((aid, url) for _, aid, url in todo)
+    print(f"[Queue] {len(todo)} new article(s), {added} enqueued (others already pending/leased or parked as failed) → {queue.db_path}")
+
+    stats = queue.stats()
+    while wait and (stats["pending"] or stats["leased"]):
+        print(f"[Queue] pending={stats['pending']} leased={stats['leased']} (expired {stats['expired']}) "
+              f"done={stats['done']} failed={stats['failed']}")
+        time.sleep(poll)
+        stats = queue.stats()
+    print(f"[Queue] {stats}")
+    if wait:
+        _final_export(csv_path)
+        _refresh_similar()  # only here, once the queue has drained: one writer for the index
+
+
+def run_worker(do_enrich: bool, parse_workers: int = PARSE_WORKERS, batch_size: int = 8,
+               lease_seconds: float = QUEUE_LEASE_SECONDS, wait: bool = False, poll: float = 10.0,
+               worker_id: str | None = None):
+    """
+    Claim batches from the queue, fetch/parse/enrich/upsert them, mark them done.
+    Leases are renewed as the batch progresses. Exits when the queue is empty,
+    or (with wait) only once no other worker holds a lease that could expire.
+    """
+    from workqueue import WorkQueue
+
+    init_db()
+    queue = WorkQueue()
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    enricher = _make_enricher(do_enrich)
+    workers = min(parse_workers or os.cpu_count() or 1, batch_size)  # a batch never has more parse jobs
+    print(f"[Worker] {worker_id}: batches of {batch_size}, lease {lease_seconds:.0f}s, parse workers={workers}")
+
+    def on_error(i, aid, url, e):
+        print(f"[{i:03d}] Fetch/parse failed ({aid}): {e}")
+        metrics.inc("fetch_failures")
+        queue.fail(worker_id, aid, f"{type(e).__name__}: {e}")
+
+    new_count, seq = 0, 0
+    with ExitStack() as executors:
+        pool = fetchers = None
+        if workers > 1:  # created once: starting parse processes per batch would dominate a long backfill
+            pool = executors.enter_context(ProcessPoolExecutor(max_workers=workers))
+            fetchers = executors.enter_context(
+                ThreadPoolExecutor(max_workers=max(1, len(sources.SOURCES)), thread_name_prefix="fetch"))
+        while True:
+            jobs = queue.claim(worker_id, batch_size, lease_seconds)
+            if not jobs:
+                stats = queue.stats()
+                if wait and stats["leased"]:
+                    time.sleep(poll)
+                    continue
+                break
+            items = [(seq + k, aid, url) for k, (aid, url) in enumerate(jobs, 1)]
+            seq += len(jobs)
+            open_ids = [aid for aid, _ in jobs]
+            for i, aid, url, art in _iter_parsed(items, workers, on_error=on_error, pool=pool, fetchers=fetchers):
+                try:
+                    if process_article(i, aid, art, enricher):
+                        new_count += 1
+                except Exception as e:
+                    print(f"[{i:03d}] Failed ({aid}): {e}")
+                    queue.fail(worker_id, aid, f"{type(e).__name__}: {e}")
+                else:
+                    queue.complete(worker_id, [aid])
+                open_ids.remove(aid)
+                if open_ids:
+                    queue.renew(worker_id, open_ids, lease_seconds)
+
+    print(f"[Queue] {queue.stats()}")
+    # no _refresh_similar() here: concurrent workers would race on the index; the coordinator refreshes it
+    print(f"[Done] {worker_id}: new rows this run: {new_count}")
+
+
 
 
 if __name__ == "__main__":
@@ -125,11 +351,67 @@ if __name__ == "__main__":
     ap.add_argument("--max-pages", type=int, default=PAGES_TO_SCAN, help="How many index pages to scan if not --all")
     ap.add_argument("--no-enrich", action="store_true", help="Skip Gemini enrichment (crawl/parse only)")
     ap.add_argument("--csv", default=str(DEFAULT_CSV_PATH), help="Output .csv path (overwrites)")
+    ap.add_argument("--source", action="append", metavar="NAME",
+                    help=f"Source adapter to crawl; repeat for several (default: CRAWL_SOURCES; known: {', '.join(sources.SOURCES)})")
+    ap.add_argument("--parse-workers", type=int, default=PARSE_WORKERS,
+                    help="Parse processes (0 = one per CPU core, 1 = parse inline)")
+    ap.add_argument("--metrics-json", help="Write a JSON run summary (per-stage timings, counters) here")
+    ap.add_argument("--metrics-prom", help="Write a Prometheus textfile-collector .prom file here")
+    mode = ap.add_mutually_exclusive_group()
+    mode.add_argument("--coordinator", action="store_true",
+                      help="Crawl and enqueue new articles into the work queue (QUEUE_DB_PATH) instead of processing them")
+    mode.add_argument("--worker", action="store_true",
+                      help="Process articles claimed from the work queue; run as many as you like")
+    ap.add_argument("--batch-size", type=int, default=8, help="--worker: jobs claimed per lease")
+    ap.add_argument("--lease", type=float, default=QUEUE_LEASE_SECONDS, help="--worker: lease length in seconds")
+    ap.add_argument("--wait", action="store_true",
+                    help="--coordinator: wait for the queue to drain, then export the CSV and refresh the similar index; "
+                         "--worker: keep polling while other workers hold leases")
+    ap.add_argument("--retry-failed", action="store_true", help="--coordinator: re-queue jobs parked as failed")
+    profiling.add_arguments(ap)
     args = ap.parse_args()
 
-    run_pipeline(
-        max_pages=args.max_pages,
-        all_pages=args.all,
-        do_enrich=not args.no_enrich,
-        csv_path=args.csv,
-    )
\ No newline at end of file
+    if args.profile and args.parse_workers != 1:
+        print("[Profile] parsing inline (--parse-workers 1) so parse time shows up in the profile")
+        args.parse_workers = 1
+
+    if args.metrics_json or args.metrics_prom:
+        metrics.enable()
+        metrics.reset()
+    try:
+        if args.coordinator:
+            with profiling.from_args(args, "pipeline-coordinator"):
+                run_coordinator(
+                    max_pages=args.max_pages,
+                    all_pages=args.all,
+                    csv_path=args.csv,
+                    wait=args.wait,
+                    retry_failed=args.retry_failed,
+                    source_names=args.source,
+                )
+        elif args.worker:
+            with profiling.from_args(args, "pipeline-worker"):
+                run_worker(
+                    do_enrich=not args.no_enrich,
+                    parse_workers=args.parse_workers,
+                    batch_size=args.batch_size,
+                    lease_seconds=args.lease,
+                    wait=args.wait,
+                )
+        else:
+            with profiling.from_args(args, "pipeline"):
+                run_pipeline(
+                    max_pages=args.max_pages,
+                    all_pages=args.all,
+                    do_enrich=not args.no_enrich,
+                    csv_path=args.csv,
+                    parse_workers=args.parse_workers,
+                    source_names=args.source,
+                )
+    finally:
+        if args.metrics_json:
+            metrics.write_json(args.metrics_json, extra={"args": vars(args)})
+            print(f"[Metrics] run summary → {args.metrics_json}")
+        if args.metrics_prom:
+            metrics.write_prometheus(args.metrics_prom)
+            print(f"[Metrics] Prometheus textfile → {args.metrics_prom}")
\ No newline at end of file
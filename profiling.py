@@ -0,0 +1,177 @@
+"""
+Opt-in profiling for the CLI entry points (pipeline.py, manage.py,
+audit_failed_enrichment.py).
+
+    --profile                     profile this run
+    --profile-mode cprofile|sample  cProfile (default) or a stdlib sampling profiler
+    --profile-out PATH            .pstats for cprofile, folded stacks for sample
+    --profile-stages a,b          only profile inside these metrics stages
+                                  (prefix match: "parse" covers parse.body etc.)
+
+Both modes profile the thread that started the profiler (the main thread).
+Stages entered on other threads (e.g. crawl_sources' per-source crawlers,
+fetch threads) are ignored by --profile-stages: cProfile.enable() only
+covers the calling thread, and the sampler only samples the main one.
+
+Sampling output is Brendan Gregg's folded-stack format, readable by
+flamegraph.pl, speedscope and inferno. cProfile output opens in snakeviz,
+gprof2dot or flameprof.
+"""
+from __future__ import annotations
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+import metrics
+from config import STATE_DIR
+
+
+def add_arguments(ap):
+    ap.add_argument("--profile", action="store_true", help="Profile this run")
+    ap.add_argument("--profile-mode", choices=["cprofile", "sample"], default="cprofile",
+                    help="cprofile = deterministic, sample = low-overhead stack sampling")
+    ap.add_argument("--profile-out", help="Profile output path (default: state/profile-<cmd>-<time>.pstats|.folded)")
+    ap.add_argument("--profile-stages",
+                    help="Comma-separated stages to profile, e.g. enrich,parse,storage (default: whole run)")
+    ap.add_argument("--profile-interval", type=float, default=0.005,
+                    help="Sampling interval in seconds for --profile-mode sample")
+
+
+class _Sampler:
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.active = True
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if not self.active:
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if frames:
+                self.stacks[";".join(reversed(frames))] += 1
+
+    def write(self, path: Path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, n in self.stacks.most_common():
+                f.write(f"{stack} {n}\n")
+
+
+class Profiler:
+    def __init__(self, mode: str = "cprofile", stages: list[str] | None = None, interval: float = 0.005):
+        self.mode = mode
+        self.stages = stages or []
+        self.interval = interval
+        self._depth = 0
+        self._thread_id: int | None = None  # the only thread whose stages count
+        self._cprof = None
+        self._sampler: _Sampler | None = None
+
+    def _selected(self, stage: str) -> bool:
+        return any(stage == s or stage.startswith(s + ".") for s in self.stages)
+
+    def _on_stage(self, stage: str, entering: bool):
+        if threading.get_ident() != self._thread_id or not self._selected(stage):
+            return
+        if entering:
+            self._depth += 1
+            if self._depth == 1:
+                self._resume()
+        else:
+            self._depth -= 1
+            if self._depth == 0:
+                self._pause()
+
+    def _resume(self):
+        if self._cprof:
+            self._cprof.enable()
+        if self._sampler:
+            self._sampler.active = True
+
+    def _pause(self):
+        if self._cprof:
+            self._cprof.disable()
+        if self._sampler:
+            self._sampler.active = False
+
+    def start(self):
+        self._thread_id = threading.get_ident()
+        if self.mode == "sample":
+            self._sampler = _Sampler(self._thread_id, self.interval)
+            self._sampler.active = not self.stages
+            self._sampler.start()
+        else:
+            import cProfile
+
+            self._cprof = cProfile.Profile()
+            if not self.stages:
+                self._cprof.enable()
+        if self.stages:
+            metrics.add_stage_hook(self._on_stage)
+
+    def stop(self):
+        if self.stages:
+            metrics.remove_stage_hook(self._on_stage)
+        if self._cprof:
+            self._cprof.disable()
+        if self._sampler:
+            self._sampler.stop()
+
+    def write(self, path: Path) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if self._sampler:
+            self._sampler.write(path)
+        elif self._cprof:
+            self._cprof.dump_stats(str(path))
+        return path
+
+    def print_top(self, n: int = 25):
+        if self._cprof and self._cprof.getstats():
+            import pstats
+
+            pstats.Stats(self._cprof, stream=sys.stdout).sort_stats("cumulative").print_stats(n)
+        elif self._sampler:
+            total = sum(self._sampler.stacks.values())
+            print(f"[Profile] {total} samples")
+
+
+def _default_out(name: str, mode: str) -> Path:
+    ext = "folded" if mode == "sample" else "pstats"
+    return STATE_DIR / f"profile-{name}-{time.strftime('%Y%m%d-%H%M%S')}.{ext}"
+
+
+@contextmanager
+def from_args(args, name: str):
+    """Wrap a CLI run in a profiler if --profile was given; no-op otherwise."""
+    if not getattr(args, "profile", None):
+        yield None
+        return
+    stages = [s.strip() for s in (args.profile_stages or "").split(",") if s.strip()]
+    prof = Profiler(mode=args.profile_mode, stages=stages, interval=args.profile_interval)
+    print(f"[Profile] {args.profile_mode} on {', '.join(stages) if stages else 'whole run'}")
+    prof.start()
+    try:
+        yield prof
+    finally:
+        prof.stop()
+        out = prof.write(Path(args.profile_out) if args.profile_out else _default_out(name, args.profile_mode))
+        prof.print_top()
+        print(f"[Profile] wrote {out}")
@@ -0,0 +1,185 @@
+"""
+Read-only HTTP/JSON API over the article store.
+
+    python service.py --port 8080
+
+    GET /articles/latest?limit=20
+    GET /articles/by-company?name=Johnson%20%26%20Johnson
+    GET /articles/by-keyword?keyword=細胞治療
+    GET /articles/by-date?from=2025-09-01&to=2025-09-30
+    GET /stats
+
+Every list endpoint takes `limit` (max 200) and `cursor` (the `next_cursor`
+of the previous page). Responses are cached in an LRU keyed by the request;
+the cache is dropped whenever the change-feed seq moves, i.e. after any
+upsert_article or delete, from this or any other process.
+"""
+from __future__ import annotations
+import argparse
+import base64
+import json
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qsl
+
+from config import DB_PATH
+from storage import connect_readonly, data_version, query_articles
+
+MAX_LIMIT = 200
+
+
+class ResponseCache:
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.version = None
+        self.hits = self.misses = 0
+        self._data: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, version: int) -> bytes | None:
+        with self._lock:
+            if version != self.version:
+                self._data.clear()
+                self.version = version
+            body = self._data.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: str, version: int, body: bytes):
+        with self._lock:
+            if version != self.version or self.maxsize <= 0:
+                return
+            self._data[key] = body
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits,
+                    "misses": self.misses, "data_version": self.version}
+
+
+def _encode_cursor(key) -> str | None:
+    if key is None:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str | None):
+    if not cursor:
+        return None
+    padded = cursor + "=" * (-len(cursor) % 4)
+    key = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    if not (isinstance(key, list) and len(key) == 2):
+        raise BadRequest("invalid cursor")
+    date, aid = key
+    return str(date), str(aid)
+
+
+class BadRequest(ValueError):
+    pass
+
+
+ROUTES = {
+    "/articles/latest": lambda q: {},
+    "/articles/by-company": lambda q: {"company": _require(q, "name")},
+    "/articles/by-keyword": lambda q: {"keyword": _require(q, "keyword")},
+    "/articles/by-date": lambda q: {"date_from": q.get("from"), "date_to": q.get("to")},
+}
+
+
+def _require(q: dict, name: str) -> str:
+    v = (q.get(name) or "").strip()
+    if not v:
+        raise BadRequest(f"missing query parameter: {name}")
+    return v
+
+
+class ArticleService:
+    def __init__(self, db_path=DB_PATH, cache_size: int = 1024):
+        self.db_path = db_path
+        self.cache = ResponseCache(cache_size)
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect_readonly(self.db_path)
+        return conn
+
+    def handle(self, raw_path: str) -> tuple[int, bytes]:
+        u = urlparse(raw_path)
+        conn = self._conn()
+        if u.path == "/stats":
+            return 200, json.dumps(self.cache.stats()).encode("utf-8")
+        route = ROUTES.get(u.path.rstrip("/"))
+        if route is None:
+            return 404, json.dumps({"error": "not found"}).encode("utf-8")
+
+        version = data_version(conn)
+        key = u.path.rstrip("/") + "?" + "&".join(sorted(u.query.split("&")))
+        body = self.cache.get(key, version)
+        if body is not None:
+            return 200, body
+
+        q = dict(parse_qsl(u.query))
+        try:
+            filters = route(q)
+            limit = max(1, min(MAX_LIMIT, int(q.get("limit", "20"))))
+            after = _decode_cursor(q.get("cursor"))
+        except (BadRequest, ValueError) as e:
+            return 400, json.dumps({"error": str(e) or "bad request"}).encode("utf-8")
+
+        rows, next_key = query_articles(conn, after=after, limit=limit, **filters)
+        body = json.dumps({"items": rows, "next_cursor": _encode_cursor(next_key)},
+                          ensure_ascii=False).encode("utf-8")
+        self.cache.put(key, version, body)
+        return 200, body
+
+    def make_server(self, host: str = "127.0.0.1", port: int = 8080) -> ThreadingHTTPServer:
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                try:
+                    status, body = service.handle(self.path)
+                except Exception as e:
+                    status, body = 500, json.dumps({"error": str(e)}).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        return server
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Read-only JSON API over the articles DB")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8080)
+    ap.add_argument("--db", default=str(DB_PATH), help="SQLite DB path (default: config.DB_PATH)")
+    ap.add_argument("--cache-size", type=int, default=1024, help="LRU response cache entries (0 = off)")
+    args = ap.parse_args()
+
+    server = ArticleService(args.db, args.cache_size).make_server(args.host, args.port)
+    print(f"Serving {args.db} on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
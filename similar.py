@@ -0,0 +1,289 @@
+"""
+Offline "related articles" index: character 2/3-gram TF-IDF over headline,
+keywords and body, kept as a sparse matrix under SIMILAR_DIR.
+
+    python manage.py similar --id 80108 --top 10
+
+Grams are hashed into N_FEATURES columns, so there is no vocabulary to keep
+in sync. Each article keeps its TOP_FEATURES heaviest grams, L2-normalised.
+The matrix is stored column-major (an inverted index), so a query only
+touches the columns of its own grams instead of scanning every article.
+The index follows the change feed: update() applies the upserts/deletes
+since its cursor. refresh() and rebuild() hold an exclusive lock file in
+the index directory from load to save, so concurrent writers (a pipeline
+run and `manage.py similar`) take turns instead of mixing generations.
+"""
+from __future__ import annotations
+import json
+import os
+import re
+import shutil
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+import metrics
+from config import SIMILAR_DIR
+from storage import fetch_changes_since, iter_article_texts, latest_change_seq
+
+FEATURE_BITS = 20
+N_FEATURES = 1 << FEATURE_BITS
+TOP_FEATURES = 128
+BODY_CHARS = 3000
+QUERY_BATCH = 64
+_MIX = np.uint64(0x9E3779B97F4A7C15)  # Fibonacci hashing: keep the top FEATURE_BITS bits
+_WS = re.compile(r"\s+")
+
+
+def _text(headline: str, keywords: list[str], body: str) -> str:
+    # headline twice: it is short but says most about what the story is
+    return _WS.sub(" ", f"{headline} {headline} {' '.join(keywords)} {body[:BODY_CHARS]}").strip().lower()
+
+
+def _grams(text: str) -> tuple[np.ndarray, np.ndarray]:
+    """Hashed character 2- and 3-grams of text → (sorted feature ids, counts)."""
+    c = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    if len(c) < 2:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    bi = (c[:-1] << np.uint64(21)) | c[1:]  # code points fit in 21 bits
+    tri = (bi[:-1] << np.uint64(21)) | c[2:] | np.uint64(1 << 63)
+    h = (np.concatenate([bi, tri]) * _MIX) >> np.uint64(64 - FEATURE_BITS)
+    return np.unique(h.astype(np.int64), return_counts=True)
+
+
+def _idf(df: np.ndarray, docs: int) -> np.ndarray:
+    return (np.log((1 + docs) / (1 + df)) + 1).astype(np.float32)
+
+
+def _weights(feats: np.ndarray, counts: np.ndarray, idf: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Sublinear tf·idf, pruned to the TOP_FEATURES heaviest grams and L2-normalised."""
+    w = (1 + np.log(counts)).astype(np.float32) * idf[feats]
+    if len(w) > TOP_FEATURES:
+        keep = np.sort(np.argpartition(w, -TOP_FEATURES)[-TOP_FEATURES:])
+        feats, w = feats[keep], w[keep]
+    norm = np.linalg.norm(w)
+    return feats.astype(np.int32), (w / norm if norm else w)
+
+
+def _stack(rows: list[tuple[np.ndarray, np.ndarray]]) -> sparse.csr_matrix:
+    """(feature ids, weights) per article → articles × N_FEATURES CSR."""
+    indptr = np.zeros(len(rows) + 1, np.int64)
+    indptr[1:] = np.cumsum([len(f) for f, _ in rows])
+    indices = np.concatenate([f for f, _ in rows]) if rows else np.empty(0, np.int32)
+    data = np.concatenate([w for _, w in rows]) if rows else np.empty(0, np.float32)
+    return sparse.csr_matrix((data, indices, indptr), shape=(len(rows), N_FEATURES))
+
+
+class SimilarIndex:
+    def __init__(self, path: Path | str = SIMILAR_DIR):
+        self.path = Path(path)
+        self.matrix = _stack([]).tocsc()  # articles × N_FEATURES
+        self.ids: list[str | None] = []  # row -> article_id (None = deleted row)
+        self.row_of: dict[str, int] = {}
+        self.df = np.zeros(N_FEATURES, np.int32)
+        self.docs = 0  # documents counted in df (deleted ones stay counted until a rebuild)
+        self.cursor = 0  # change-feed seq the index is current with
+        self._gen = 0
+
+    @staticmethod
+    def exists(path: Path | str = SIMILAR_DIR) -> bool:
+        return (Path(path) / "meta.json").exists()
+
+    @classmethod
+    @metrics.timed("similar.load")
+    def load(cls, path: Path | str = SIMILAR_DIR) -> SimilarIndex:
+        idx = cls(path)
+        meta = json.loads((idx.path / "meta.json").read_text(encoding="utf-8"))
+        if meta["n_features"] != N_FEATURES or meta["top_features"] != TOP_FEATURES:
+            raise RuntimeError(f"{idx.path} was built with different settings; rebuild it")
+        d = idx.path / meta["dir"]
+        arr = {k: np.load(d / f"{k}.npy", mmap_mode="r") for k in ("data", "indices", "indptr", "df")}
+        idx.ids = json.loads((d / "ids.json").read_text(encoding="utf-8"))
+        idx.matrix = sparse.csc_matrix((arr["data"], arr["indices"], arr["indptr"]),
+                                       shape=(len(idx.ids), N_FEATURES), copy=False)
+        idx.df = arr["df"]
+        idx.row_of = {aid: i for i, aid in enumerate(idx.ids) if aid is not None}
+        idx.docs, idx.cursor, idx._gen = meta["docs"], meta["cursor"], meta["gen"]
+        return idx
+
+    def save(self):
+        """Write a new generation directory, then switch meta.json to it."""
+        self._gen += 1
+        name = f"gen-{self._gen:06d}"
+        d = self.path / name
+        d.mkdir(parents=True, exist_ok=True)
+        m = self.matrix
+        for k, a in (("data", m.data), ("indices", m.indices), ("indptr", m.indptr), ("df", self.df)):
+            np.save(d / f"{k}.npy", np.ascontiguousarray(a))
+        (d / "ids.json").write_text(json.dumps(self.ids, ensure_ascii=False), encoding="utf-8")
+        meta = {"dir": name, "gen": self._gen, "cursor": self.cursor, "docs": self.docs,
+                "rows": len(self.ids), "articles": len(self.row_of),
+                "n_features": N_FEATURES, "top_features": TOP_FEATURES}
+        tmp = self.path / "meta.json.tmp"
+        tmp.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+        tmp.replace(self.path / "meta.json")
+        for old in self.path.glob("gen-*"):
+            if old.name != name:
+                shutil.rmtree(old, ignore_errors=True)  # may still be mapped by a reader on Windows
+
+    @metrics.timed("similar.build")
+    def build(self) -> int:
+        """Index every article from scratch (two passes: df, then weights). Returns rows indexed."""
+        self.cursor = latest_change_seq()  # anything written during the build is re-applied by update()
+        df = np.zeros(N_FEATURES, np.int32)
+        docs = 0
+        for _, headline, keywords, body in iter_article_texts():
+            feats, _ = _grams(_text(headline, keywords, body))
+            df[feats] += 1
+            docs += 1
+        idf = _idf(df, docs)
+        rows, ids = [], []
+        for aid, headline, keywords, body in iter_article_texts():
+            rows.append(_weights(*_grams(_text(headline, keywords, body)), idf))
+            ids.append(aid)
+        self.df, self.docs = df, docs
+        self.matrix = _stack(rows).tocsc()
+        self.ids = ids
+        self.row_of = {aid: i for i, aid in enumerate(ids)}
+        return len(ids)
+
+    @metrics.timed("similar.update")
+    def update(self) -> int:
+        """Apply change-feed entries since self.cursor. Returns the number of articles touched."""
+        changes, cursor = fetch_changes_since(self.cursor)
+        if not changes:
+            return 0
+        last_op = {c["article_id"]: c["op"] for c in changes}
+        stale = [self.row_of.pop(aid) for aid in last_op if aid in self.row_of]
+        for row in stale:
+            self.ids[row] = None
+        m = self.matrix
+        data = np.array(m.data)  # writable copy of the (possibly mmapped) weights
+        if stale:
+            data[np.isin(m.indices, stale)] = 0
+
+        df = np.array(self.df)
+        grams = []
+        for aid, headline, keywords, body in iter_article_texts([a for a, op in last_op.items() if op == "upsert"]):
+            feats, counts = _grams(_text(headline, keywords, body))
+            df[feats] += 1
+            grams.append((aid, feats, counts))
+        self.df, self.docs = df, self.docs + len(grams)
+        idf = _idf(df, self.docs)
+        old = sparse.csc_matrix((data, m.indices, m.indptr), shape=m.shape)
+        new = _stack([_weights(feats, counts, idf) for _, feats, counts in grams])
+        self.matrix = sparse.vstack([old, new], format="csc", dtype=np.float32)
+        for aid, _, _ in grams:
+            self.row_of[aid] = len(self.ids)
+            self.ids.append(aid)
+
+        dead = len(self.ids) - len(self.row_of)
+        if dead > max(1000, len(self.ids) // 4):
+            self._compact()
+        self.cursor = cursor
+        return len(last_op)
+
+    def _compact(self):
+        live = [i for i, aid in enumerate(self.ids) if aid is not None]
+        self.matrix = self.matrix[live].tocsc()
+        self.ids = [self.ids[i] for i in live]
+        self.row_of = {aid: i for i, aid in enumerate(self.ids)}
+
+    def _top(self, scores: np.ndarray, k: int, exclude: int | None = None) -> list[tuple[str, float]]:
+        if exclude is not None:
+            scores[exclude] = 0
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(scores, -k)[-k:]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[i], round(float(scores[i]), 4)) for i in top if scores[i] > 0 and self.ids[i] is not None]
+
+    def _vectors(self, texts) -> tuple[list, sparse.csr_matrix]:
+        """(key, headline, keywords, body) tuples → keys and their query rows (current idf)."""
+        idf = _idf(np.asarray(self.df), self.docs)
+        keys, rows = [], []
+        for key, headline, keywords, body in texts:
+            keys.append(key)
+            rows.append(_weights(*_grams(_text(headline, keywords, body)), idf))
+        return keys, _stack(rows)
+
+    def _scores(self, q: sparse.csr_matrix) -> np.ndarray:
+        """Cosine of every article against each query row → articles × queries."""
+        cols = np.unique(q.indices)
+        return (self.matrix[:, cols] @ q[:, cols].T).toarray()
+
+    @metrics.timed("similar.query")
+    def query(self, article_ids: list[str], k: int = 10) -> dict[str, list[tuple[str, float]]]:
+        """Top-k most similar articles (article_id, cosine) for each id; ids not in the DB are skipped."""
+        keys, q = self._vectors(iter_article_texts(article_ids))
+        out = {}
+        for start in range(0, len(keys), QUERY_BATCH):  # bounds the dense articles × batch score block
+            scores = self._scores(q[start:start + QUERY_BATCH])
+            for j, aid in enumerate(keys[start:start + QUERY_BATCH]):
+                out[aid] = self._top(scores[:, j], k, exclude=self.row_of.get(aid))
+        return {aid: out[aid] for aid in article_ids if aid in out}  # caller's order
+
+    @metrics.timed("similar.query")
+    def query_text(self, text: str, k: int = 10) -> list[tuple[str, float]]:
+        """Top-k articles similar to free text (e.g. a story not in the DB yet)."""
+        _, q = self._vectors([(None, text, [], "")])
+        return self._top(self._scores(q)[:, 0], k)
+
+
+@contextmanager
+def _writer_lock(path: Path | str):
+    """Exclusive lock on <index dir>/.lock; blocks until no other process is writing the index."""
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    with open(path / ".lock", "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.2)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def rebuild(path: Path | str = SIMILAR_DIR) -> tuple[SimilarIndex, int]:
+    """Build the index from scratch and save it."""
+    with _writer_lock(path):
+        idx = SimilarIndex(path)
+        n = idx.build()
+        idx.save()
+        return idx, n
+
+
+def refresh(path: Path | str = SIMILAR_DIR) -> tuple[SimilarIndex, int]:
+    """Load the index (building it the first time) and apply pending changes."""
+    with _writer_lock(path):
+        if not SimilarIndex.exists(path):
+            idx = SimilarIndex(path)
+            n = idx.build()
+            idx.save()
+            return idx, n
+        idx = SimilarIndex.load(path)
+        n = idx.update()
+        if n:
+            idx.save()
+        return idx, n
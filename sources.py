@@ -0,0 +1,156 @@
+"""
+Source adapters: everything site-specific about crawling one news outlet.
+
+crawler.py and parser.py are generic; they ask the adapter how to build
+index page URLs, which links are articles, how the pager works, how to
+get an article_id out of a URL and where the body lives. To add an
+outlet, subclass SourceAdapter, override what differs and register() it;
+then list its name in CRAWL_SOURCES (or pass --source to pipeline.py).
+
+article_id is the DB's unique key across all sources, so adapters other
+than the original GBI one return namespaced ids ("<name>:<id>").
+"""
+from __future__ import annotations
+from urllib.parse import urljoin, urlparse, parse_qsl, urlencode, urlunparse
+
+from bs4 import BeautifulSoup
+
+from config import BASE_INDEX_URL, CRAWL_SOURCES
+
+
+class SourceAdapter:
+    name = ""
+    index_url = ""
+    article_path = ""  # path of article pages, e.g. /tw/article/show.php
+    id_param = "num"  # query parameter holding the article number
+    min_delay: float | None = None  # per-host floor between requests (None = REQUEST_DELAY)
+
+    # parser.py: tried before the generic heuristics
+    headline_selectors: list[str] = []
+    date_selectors: list[str] = []
+    body_selectors: list[str] = []
+    exclude_inside_body: list[str] = []
+
+    @property
+    def host(self) -> str:
+        return urlparse(self.index_url).netloc.lower()
+
+    def index_page_url(self, page: int | None) -> str:
+        return self.index_url if (page is None or page == 1) else f"{self.index_url}?page={page}"
+
+    def _number(self, url: str) -> str | None:
+        qs = dict(parse_qsl(urlparse(url).query, keep_blank_values=True))
+        num = qs.get(self.id_param)
+        return num if num and num.isdigit() else None
+
+    def is_article_url(self, href: str) -> bool:
+        u = urlparse(urljoin(self.index_url, href))
+        return u.path == self.article_path and self._number(u.geturl()) is not None
+
+    def normalize_url(self, href: str) -> str:
+        """Absolute URL with only the id parameter kept, so one article has one URL."""
+        u = urlparse(urljoin(self.index_url, href))
+        qs = dict(parse_qsl(u.query, keep_blank_values=True))
+        new_qs = {self.id_param: qs[self.id_param]} if self.id_param in qs else {}
+        return urlunparse((u.scheme, u.netloc, u.path, u.params, urlencode(new_qs, doseq=True), ""))
+
+    def article_id(self, url: str) -> str | None:
+        num = self._number(url)
+        return f"{self.name}:{num}" if num else None
+
+    def article_links(self, index_html: str) -> list[str]:
+        soup = BeautifulSoup(index_html, "html.parser")
+        uniq, seen = [], set()
+        for a in soup.find_all("a", href=True):
+            href = a["href"].strip()
+            if href.startswith("#") or href.lower().startswith("javascript:"):
+                continue
+            if self.is_article_url(href):
+                u = self.normalize_url(href)
+                if u not in seen:
+                    uniq.append(u)
+                    seen.add(u)
+        return uniq
+
+    def pager(self, index_html: str) -> dict:
+        """{"next_page": int | None, "last_page": int | None, "pages_in_nav": [int]}"""
+        return {"next_page": None, "last_page": None, "pages_in_nav": []}
+
+
+class GBISource(SourceAdapter):
+    """news.gbimonthly.com (Chinese edition)."""
+    name = "gbi"
+    index_url = BASE_INDEX_URL
+    article_path = "/tw/article/show.php"
+    headline_selectors = ["div.titleBox > h1"]
+    date_selectors = ["div.reporter div.date"]
+    body_selectors = [
+        'div.editor.fsize_area[itemprop="articleBody"]',
+        '.editor.fsize_area[itemprop="articleBody"]',
+    ]
+    exclude_inside_body = [
+        "div.copyright",
+        "div.tagBox",
+        "div.recommend",
+        "div.reporter-con",
+        "div.nextBox",
+        "div.read",
+        "div.sub-btn",
+        "div.adBox",
+    ]
+
+    def article_id(self, url: str) -> str | None:
+        return self._number(url)  # bare number: the key existing rows were stored under
+
+    def pager(self, index_html: str) -> dict:
+        soup = BeautifulSoup(index_html, "html.parser")
+        pager = soup.find("ul", class_="pager")
+        out = {"next_page": None, "last_page": None, "pages_in_nav": []}
+        if not pager:
+            return out
+
+        for a in pager.find_all("a", href=True):
+            href = a["href"]
+            if "page=" in href and a.get_text(strip=True).isdigit():
+                try:
+                    out["pages_in_nav"].append(int(href.split("page=")[-1]))
+                except ValueError:
+                    pass
+
+        for key, cls in (("next_page", "next"), ("last_page", "last")):
+            a = pager.find("a", class_=cls)
+            if a and "page=" in a.get("href", ""):
+                try:
+                    out[key] = int(a["href"].split("page=")[-1])
+                except ValueError:
+                    pass
+        return out
+
+
+SOURCES: dict[str, SourceAdapter] = {}
+
+
+def register(source: SourceAdapter) -> SourceAdapter:
+    SOURCES[source.name] = source
+    return source
+
+
+DEFAULT_SOURCE = register(GBISource())
+
+
+def get_sources(names: list[str] | None = None) -> list[SourceAdapter]:
+    """Adapters for the given names (default: CRAWL_SOURCES)."""
+    names = names or CRAWL_SOURCES
+    unknown = [n for n in names if n not in SOURCES]
+    if unknown:
+        raise ValueError(f"Unknown source(s): {', '.join(unknown)} (known: {', '.join(SOURCES)})")
+    return [SOURCES[n] for n in names]
+
+
+def for_url(url: str) -> SourceAdapter:
+    """The adapter whose host serves url; DEFAULT_SOURCE when none matches."""
+    host = urlparse(url).netloc.lower()
+    for source in SOURCES.values():
+        if source.host == host:
+            return source
+    return DEFAULT_SOURCE
@@ -1,34 +1,91 @@
 from __future__ import annotations
 import json
 import sqlite3
+import zlib
 from contextlib import contextmanager
 from pathlib import Path
-import pandas as pd
-from config import DB_PATH
-import json
-from typing import Iterable
+from typing import Iterable, TYPE_CHECKING
+
+import metrics
+from config import DB_PATH, DB_JOURNAL_MODE, BODY_COMPRESSION, BODY_ZSTD_LEVEL, ensure_dirs
+
+if TYPE_CHECKING:
+    import pandas as pd
 
+@metrics.timed("storage.delete_article_by_id")
 def delete_article_by_id(article_id: str) -> int:
     """Delete a single article. Returns number of rows deleted (0 or 1)."""
     with get_conn() as conn:
         cur = conn.execute("DELETE FROM articles WHERE article_id = ?", (article_id,))
         return cur.rowcount or 0
 
-def delete_articles(ids: Iterable[str]) -> int:
-    """Delete multiple article_ids. Returns number of rows deleted."""
-    ids = [str(x).strip() for x in ids if str(x).strip()]
-    if not ids:
+ID_CHUNK = 500  # ids per statement; stays under SQLite's host-parameter limit (999 on older builds)
+
+
+def _chunks(ids: Iterable[str], size: int):
+    chunk = []
+    for x in ids:
+        x = str(x).strip()
+        if x:
+            chunk.append(x)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+@metrics.timed("storage.delete_articles")
+def delete_articles(ids: Iterable[str], chunk_size: int = ID_CHUNK, on_chunk=None) -> int:
+    """
+    Delete article_ids streamed from any iterable, one transaction per chunk:
+    write locks stay short, memory stays flat, and re-running after a failure
+    just finishes the job. on_chunk(ids, deleted) is called after each commit.
+    Returns number of rows deleted.
+    """
+    total = 0
+    with get_conn() as conn:
+        for chunk in _chunks(ids, chunk_size):
+            with conn:
+                cur = conn.execute(
+                    f"DELETE FROM articles WHERE article_id IN ({','.join('?' * len(chunk))})", chunk
+                )
+            total += cur.rowcount or 0
+            if on_chunk:
+                on_chunk(chunk, cur.rowcount or 0)
+    return total
+
+
+@metrics.timed("storage.update_articles")
+def update_articles(ids: Iterable[str], values: dict, chunk_size: int = ID_CHUNK, on_chunk=None) -> int:
+    """
+    Set the same column values on article_ids streamed from any iterable,
+    chunked and committed like delete_articles. List columns take a list.
+    Returns number of rows updated.
+    """
+    bad = [c for c in values if c not in CHANGE_TRACKED_COLS]  # i.e. every column that is not bookkeeping
+    if bad:
+        raise ValueError(f"Not updatable: {', '.join(bad)} (allowed: {', '.join(CHANGE_TRACKED_COLS)})")
+    if not values:
         return 0
-    placeholders = ",".join(["?"] * len(ids))
+    params = [json.dumps(v, ensure_ascii=False) if isinstance(v, list) else v for v in values.values()]
+    assign = ", ".join(f"{c} = ?" for c in values)
+    total = 0
     with get_conn() as conn:
-        cur = conn.execute(f"DELETE FROM articles WHERE article_id IN ({placeholders})", ids)
-        return cur.rowcount or 0
-    
-def _list_json_to_str(cell):
-    try:
-        arr = json.loads(cell) if cell else []
-    except Exception:
-        return str(cell)
+        for chunk in _chunks(ids, chunk_size):
+            with conn:
+                cur = conn.execute(
+                    f"UPDATE articles SET {assign} WHERE article_id IN ({','.join('?' * len(chunk))})",
+                    params + chunk,
+                )
+            total += cur.rowcount or 0
+            if on_chunk:
+                on_chunk(chunk, cur.rowcount or 0)
+    return total
+
+
+def _list_json(cell) -> list[str]:
+    arr = json.loads(cell) if cell else []
     names = []
     for item in arr:
         if isinstance(item, str):
@@ -48,7 +105,86 @@ def _list_json_to_str(cell):
     for n in names:
         if n not in seen:
             seen.add(n); out.append(n)
-    return ", ".join(out)
+    return out
+
+
+def _decode_list_fields(row: dict):
+    """JSON list columns → list[str], in place (for JSON/NDJSON consumers)."""
+    for k in ("keywords", "companies_ranked"):
+        try:
+            row[k] = _list_json(row[k])
+        except Exception:
+            row[k] = [str(row[k])] if row[k] else []
+
+
+def _list_json_to_str(cell):
+    try:
+        return ", ".join(_list_json(cell))
+    except Exception:
+        return str(cell)
+
+
+# --- body compression -------------------------------------------------------
+# Compressed bodies are BLOBs: b"Z" + zlib stream, or b"S" + 4-byte dict_id +
+# zstd frame (dict_id 0 = no dictionary). Legacy rows stay TEXT and are
+# returned as-is, so old and new rows can coexist until compress_bodies runs.
+_ZLIB, _ZSTD = b"Z", b"S"
+_zstd_dicts: dict = {}
+
+
+def _zstd():
+    if BODY_COMPRESSION not in ("auto", "zstd"):
+        return None
+    try:
+        import zstandard
+    except ImportError:
+        if BODY_COMPRESSION == "zstd":
+            raise RuntimeError("BODY_COMPRESSION=zstd but the zstandard package is not installed")
+        return None
+    return zstandard
+
+
+def _zstd_dict(conn, dict_id: int):
+    if dict_id not in _zstd_dicts:
+        row = conn.execute("SELECT data FROM body_dicts WHERE dict_id = ?", (dict_id,)).fetchone()
+        if not row:
+            raise RuntimeError(f"zstd dictionary {dict_id} missing from body_dicts")
+        import zstandard
+
+        _zstd_dicts[dict_id] = zstandard.ZstdCompressionDict(bytes(row[0]))
+    return _zstd_dicts[dict_id]
+
+
+def _encode_body(conn, text: str | None):
+    if text is None or BODY_COMPRESSION == "none":
+        return text
+    raw = text.encode("utf-8")
+    z = _zstd()
+    if z is None:
+        return _ZLIB + zlib.compress(raw, 9)
+    row = conn.execute("SELECT MAX(dict_id) FROM body_dicts").fetchone()
+    dict_id = row[0] or 0
+    if dict_id:
+        cctx = z.ZstdCompressor(level=BODY_ZSTD_LEVEL, dict_data=_zstd_dict(conn, dict_id))
+    else:
+        cctx = z.ZstdCompressor(level=BODY_ZSTD_LEVEL)
+    return _ZSTD + dict_id.to_bytes(4, "big") + cctx.compress(raw)
+
+
+def _decode_body(conn, value) -> str | None:
+    if value is None or isinstance(value, str):
+        return value
+    value = bytes(value)
+    if value[:1] == _ZLIB:
+        return zlib.decompress(value[1:]).decode("utf-8")
+    if value[:1] == _ZSTD:
+        import zstandard
+
+        dict_id = int.from_bytes(value[1:5], "big")
+        dctx = zstandard.ZstdDecompressor(dict_data=_zstd_dict(conn, dict_id)) if dict_id \
+            else zstandard.ZstdDecompressor()
+        return dctx.decompress(value[5:]).decode("utf-8")
+    return value.decode("utf-8")
 
 
 @contextmanager
@@ -61,7 +197,28 @@ def get_conn(db_path: Path | str = DB_PATH):
         conn.close()
 
 
+JOURNAL_MODES = ("wal", "delete", "truncate", "persist")
+
+
+def set_journal_mode(conn, mode: str):
+    """
+    PRAGMA journal_mode with a checked value. WAL keeps its index in shared
+    memory (-shm), so it is only safe when every process is on one host;
+    a DB shared between hosts over a network filesystem needs a rollback
+    journal ("delete").
+    """
+    if mode not in JOURNAL_MODES:
+        raise RuntimeError(f"Unknown journal mode {mode!r} (use one of: {', '.join(JOURNAL_MODES)})")
+    try:
+        got = conn.execute(f"PRAGMA journal_mode={mode}").fetchone()[0]
+    except sqlite3.OperationalError:  # "database is locked": another connection is open
+        got = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    if got != mode:  # switching out of WAL needs the DB to itself; try again when no one else has it open
+        print(f"[DB] journal_mode is still {got} (wanted {mode}); close other connections and retry")
+
+
 def init_db():
+    ensure_dirs()
     with get_conn() as conn:
         conn.execute(
             """
@@ -83,19 +240,246 @@ def init_db():
         cols = {r[1] for r in conn.execute("PRAGMA table_info(articles)").fetchall()}  # r[1] is name
         if "keywords" not in cols:
             conn.execute("ALTER TABLE articles ADD COLUMN keywords TEXT")  # JSON array of strings
+        # WAL lets readers (service.py) run concurrently with the pipeline's writes (same host only)
+        set_journal_mode(conn, DB_JOURNAL_MODE)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_articles_date ON articles(COALESCE(publish_date, ''), article_id)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_articles_primary_company "
+            "ON articles(primary_company, COALESCE(publish_date, ''), article_id)"
+        )
+        _init_change_feed(conn)
+        _init_trends(conn)
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS body_dicts (
+              dict_id INTEGER PRIMARY KEY AUTOINCREMENT,
+              data BLOB NOT NULL,
+              created_at TEXT DEFAULT (datetime('now'))
+            );
+            """
+        )
+
+
+# --- change feed --------------------------------------------------------------
+# Triggers keep one article_changes row per article_id holding the seq of its
+# latest insert/update/delete (deletes stay behind as tombstones). seq is
+# AUTOINCREMENT, so it never goes backwards and works as an export cursor.
+# Body-only updates (compress_bodies) are not exported and not recorded.
+CHANGE_TRACKED_COLS = [
+    "url", "headline", "publish_date", "companies_ranked", "primary_company",
+    "company_one_liner", "summary_zh_tw", "summary_en", "keywords",
+]
+
+
+def _init_change_feed(conn):
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'article_changes'"
+    ).fetchone()
+    conn.executescript(
+        f"""
+        CREATE TABLE IF NOT EXISTS article_changes (
+          seq INTEGER PRIMARY KEY AUTOINCREMENT,
+          article_id TEXT NOT NULL,
+          op TEXT NOT NULL,  -- 'upsert' | 'delete'
+          changed_at TEXT DEFAULT (datetime('now'))
+        );
+        CREATE INDEX IF NOT EXISTS idx_article_changes_article_id ON article_changes(article_id);
+
+        CREATE TRIGGER IF NOT EXISTS articles_change_ins AFTER INSERT ON articles BEGIN
+          DELETE FROM article_changes WHERE article_id = NEW.article_id;
+          INSERT INTO article_changes (article_id, op) VALUES (NEW.article_id, 'upsert');
+        END;
+        CREATE TRIGGER IF NOT EXISTS articles_change_upd
+        AFTER UPDATE OF {", ".join(CHANGE_TRACKED_COLS)} ON articles BEGIN
+          DELETE FROM article_changes WHERE article_id = NEW.article_id;
+          INSERT INTO article_changes (article_id, op) VALUES (NEW.article_id, 'upsert');
+        END;
+        CREATE TRIGGER IF NOT EXISTS articles_change_del AFTER DELETE ON articles BEGIN
+          DELETE FROM article_changes WHERE article_id = OLD.article_id;
+          INSERT INTO article_changes (article_id, op) VALUES (OLD.article_id, 'delete');
+        END;
+        """
+    )
+    if not exists:  # first run on an existing DB: every current row is a change
+        conn.execute(
+            "INSERT INTO article_changes (article_id, op) "
+            "SELECT article_id, 'upsert' FROM articles ORDER BY fetched_at, rowid"
+        )
+
+
+@metrics.timed("storage.fetch_changes_since")
+def fetch_changes_since(cursor: int = 0, limit: int | None = None) -> tuple[list[dict], int]:
+    """
+    Changes with seq > cursor, oldest first, as dicts (list fields decoded).
+    Deletes carry only seq/op/article_id/changed_at. Returns (rows, next_cursor).
+    """
+    sql = (
+        "SELECT c.seq, c.op, c.changed_at, c.article_id, a.url, a.headline, a.publish_date, a.keywords, "
+        "a.companies_ranked, a.primary_company, a.company_one_liner, a.summary_zh_tw, a.summary_en, a.fetched_at "
+        "FROM article_changes c LEFT JOIN articles a ON a.article_id = c.article_id "
+        "WHERE c.seq > ? ORDER BY c.seq"
+    )
+    params: list = [int(cursor)]
+    if limit:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+    with get_conn() as conn:
+        conn.row_factory = sqlite3.Row
+        rows = [dict(r) for r in conn.execute(sql, params)]
+    for r in rows:
+        if r["op"] == "delete":
+            for k in list(r):
+                if k not in ("seq", "op", "changed_at", "article_id"):
+                    del r[k]
+            continue
+        _decode_list_fields(r)
+    return rows, (rows[-1]["seq"] if rows else int(cursor))
+
+
+# --- trend rollups -------------------------------------------------------------
+# trend_rollups holds mention counts per (kind, grain, bucket, name), kept in
+# step with articles by triggers: insert adds the row's contribution, delete
+# subtracts it, and an update of publish_date/companies_ranked/keywords does
+# both. Company weight is 1/rank in companies_ranked; keywords weigh 1 each.
+TREND_KINDS = {"company": ("companies_ranked", "1.0 / (j.key + 1)"), "keyword": ("keywords", "1.0")}
+TREND_GRAINS = {"day": "date({r}.publish_date)", "week": "date({r}.publish_date, 'weekday 0', '-6 days')"}
+
+
+def _trend_selects(r: str, sign: str = "", source: str = ""):
+    """One SELECT per (kind, grain) yielding a contribution row per mention in article alias `r`."""
+    for kind, (col, weight) in TREND_KINDS.items():
+        for grain, bucket in TREND_GRAINS.items():
+            yield (
+                f"SELECT '{kind}' AS kind, '{grain}' AS grain, {bucket.format(r=r)} AS bucket, "
+                f"trim(j.value) AS name, {sign}1 AS mentions, {sign}{weight} AS weight "
+                f"FROM {source}json_each(CASE WHEN json_valid({r}.{col}) THEN {r}.{col} ELSE '[]' END) AS j "
+                f"WHERE date({r}.publish_date) IS NOT NULL AND j.type = 'text' AND trim(j.value) <> ''"
+            )
 
 
+def _trend_apply_sql(r: str, sign: str) -> str:
+    return "\n".join(
+        f"INSERT INTO trend_rollups (kind, grain, bucket, name, mentions, weight) {sel} "
+        f"ON CONFLICT(kind, grain, bucket, name) DO UPDATE SET "
+        f"mentions = mentions + excluded.mentions, weight = weight + excluded.weight;"
+        for sel in _trend_selects(r, sign)
+    )
+
+
+def _trend_cleanup_sql(r: str) -> str:
+    """Drop the rows article `r` just brought to zero (primary-key lookups, not a table scan)."""
+    return "\n".join(
+        f"DELETE FROM trend_rollups WHERE (kind, grain, bucket, name) IN "
+        f"(SELECT kind, grain, bucket, name FROM ({sel})) AND mentions <= 0;"
+        for sel in _trend_selects(r)
+    )
+
+
+def _init_trends(conn):
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'trend_rollups'"
+    ).fetchone()
+    conn.executescript(
+        f"""
+        CREATE TABLE IF NOT EXISTS trend_rollups (
+          kind TEXT NOT NULL,   -- 'company' | 'keyword'
+          grain TEXT NOT NULL,  -- 'day' | 'week' (bucket = Monday)
+          bucket TEXT NOT NULL, -- YYYY-MM-DD
+          name TEXT NOT NULL,
+          mentions INTEGER NOT NULL,
+          weight REAL NOT NULL,
+          PRIMARY KEY (kind, grain, bucket, name)
+        ) WITHOUT ROWID;
+
+        CREATE TRIGGER IF NOT EXISTS articles_trends_ins AFTER INSERT ON articles BEGIN
+          {_trend_apply_sql("NEW", "")}
+        END;
+        CREATE TRIGGER IF NOT EXISTS articles_trends_upd
+        AFTER UPDATE OF publish_date, companies_ranked, keywords ON articles BEGIN
+          {_trend_apply_sql("OLD", "-")}
+          {_trend_apply_sql("NEW", "")}
+          {_trend_cleanup_sql("OLD")}
+        END;
+        CREATE TRIGGER IF NOT EXISTS articles_trends_del AFTER DELETE ON articles BEGIN
+          {_trend_apply_sql("OLD", "-")}
+          {_trend_cleanup_sql("OLD")}
+        END;
+        """
+    )
+    if not exists:
+        _rebuild_trends(conn)
+
+
+def _rebuild_trends(conn):
+    conn.execute("DELETE FROM trend_rollups")
+    for sel in _trend_selects("a", source="articles AS a, "):
+        conn.execute(
+            "INSERT INTO trend_rollups (kind, grain, bucket, name, mentions, weight) "
+            f"SELECT kind, grain, bucket, name, SUM(mentions), SUM(weight) FROM ({sel}) "
+            "GROUP BY kind, grain, bucket, name"
+        )
+
+
+def rebuild_trends():
+    """Recompute trend_rollups from scratch (the triggers keep it current afterwards)."""
+    with get_conn() as conn:
+        _rebuild_trends(conn)
+
+
+@metrics.timed("storage.fetch_trends")
+def fetch_trends(kind: str = "company", grain: str = "week", since: str | None = None,
+                 until: str | None = None, top: int = 10, total: bool = False) -> list[dict]:
+    """
+    Top `top` names per bucket (newest bucket first), read from trend_rollups.
+    total=True sums the range and returns one overall top list instead.
+    """
+    if kind not in TREND_KINDS or grain not in TREND_GRAINS:
+        raise ValueError(f"kind must be one of {list(TREND_KINDS)}, grain one of {list(TREND_GRAINS)}")
+    where = "kind = ? AND grain = ? AND bucket >= ? AND bucket <= ?"
+    params = [kind, grain, since or "0000-00-00", until or "9999-99-99"]
+    if total:
+        sql = (
+            f"SELECT name, SUM(mentions) AS mentions, SUM(weight) AS weight FROM trend_rollups WHERE {where} "
+            "GROUP BY name ORDER BY weight DESC, mentions DESC, name LIMIT ?"
+        )
+    else:
+        sql = (
+            "SELECT bucket, name, mentions, weight FROM ("
+            "  SELECT bucket, name, mentions, weight, ROW_NUMBER() OVER ("
+            "    PARTITION BY bucket ORDER BY weight DESC, mentions DESC, name) AS rn "
+            f"  FROM trend_rollups WHERE {where}"
+            ") WHERE rn <= ? ORDER BY bucket DESC, rn"
+        )
+    with get_conn() as conn:
+        conn.row_factory = sqlite3.Row
+        rows = [dict(r) for r in conn.execute(sql, params + [int(top)])]
+    for r in rows:
+        r["weight"] = round(r["weight"], 4)
+    return rows
+
+
+def latest_change_seq() -> int:
+    with get_conn() as conn:
+        row = conn.execute("SELECT MAX(seq) FROM article_changes").fetchone()
+        return row[0] or 0
+
+
+@metrics.timed("storage.have_article")
 def have_article(article_id: str) -> bool:
     with get_conn() as conn:
         cur = conn.execute("SELECT 1 FROM articles WHERE article_id = ? LIMIT 1", (article_id,))
         return cur.fetchone() is not None
 
 
+@metrics.timed("storage.upsert_article")
 def upsert_article(row: dict):
     # Ensure JSON serialization for list fields
     companies_json = json.dumps(row.get("companies_ranked") or [], ensure_ascii=False)
     keywords_json  = json.dumps(row.get("keywords") or [], ensure_ascii=False)
     with get_conn() as conn:
+        body = _encode_body(conn, row.get("body"))
         conn.execute(
             """
             INSERT INTO articles (
@@ -117,7 +501,7 @@ def upsert_article(row: dict):
             ;
             """,
             (
-                row.get("article_id"), row.get("url"), row.get("headline"), row.get("publish_date"), row.get("body"),
+                row.get("article_id"), row.get("url"), row.get("headline"), row.get("publish_date"), body,
                 companies_json, row.get("primary_company"), row.get("company_one_liner"),
                 row.get("summary_zh_tw"), row.get("summary_en"),
                 keywords_json
@@ -125,7 +509,11 @@ def upsert_article(row: dict):
         )
 
 
+@metrics.timed("storage.fetch_all_df")
 def fetch_all_df() -> pd.DataFrame:
+    import pandas as pd  # lazy: keeps pandas out of short CLI commands
+
+    # body is deliberately not selected: it is large, compressed and not exported
     with get_conn() as conn:
         df = pd.read_sql_query(
             "SELECT article_id, url, headline, publish_date, "
@@ -141,3 +529,205 @@ def fetch_all_df() -> pd.DataFrame:
             df["keywords"] = df["keywords"].apply(_list_json_to_str)
     return df
 
+
+def fetch_csv_rows(ids: Iterable[str], chunk_size: int = ID_CHUNK):
+    """Yield current rows for ids in CSV form (same columns/formatting as fetch_all_df); missing ids are skipped."""
+    with get_conn() as conn:
+        conn.row_factory = sqlite3.Row
+        for chunk in _chunks(ids, chunk_size):
+            for r in conn.execute(
+                f"SELECT {', '.join(ARTICLE_LIST_COLS)} FROM articles "
+                f"WHERE article_id IN ({','.join('?' * len(chunk))})", chunk,
+            ):
+                row = dict(r)
+                row["companies_ranked"] = _list_json_to_str(row["companies_ranked"])
+                row["keywords"] = _list_json_to_str(row["keywords"])
+                yield row
+
+
+def db_size_bytes(db_path: Path | str = DB_PATH) -> int:
+    """Main DB file plus its WAL."""
+    return sum(p.stat().st_size for p in (Path(db_path), Path(f"{db_path}-wal")) if p.exists())
+
+
+@metrics.timed("storage.vacuum")
+def vacuum():
+    """Rebuild the DB file to drop free pages (needs free disk about the DB's size; blocks writers)."""
+    with get_conn() as conn:
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+@metrics.timed("storage.analyze")
+def analyze():
+    """Refresh the query planner's statistics (after bulk deletes/imports)."""
+    with get_conn() as conn:
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA optimize")
+
+
+def get_article_body(article_id: str) -> str | None:
+    """Decompressed body text (bodies are stored compressed; see _encode_body)."""
+    with get_conn() as conn:
+        row = conn.execute("SELECT body FROM articles WHERE article_id = ?", (article_id,)).fetchone()
+        return _decode_body(conn, row[0]) if row else None
+
+
+def fetch_headlines(ids: Iterable[str]) -> dict[str, tuple[str, str]]:
+    """article_id -> (headline, publish_date) for the given ids."""
+    ids, out = list(ids), {}
+    with get_conn() as conn:
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            for aid, headline, date in conn.execute(
+                f"SELECT article_id, headline, publish_date FROM articles "
+                f"WHERE article_id IN ({','.join('?' * len(chunk))})", chunk,
+            ):
+                out[aid] = (headline or "", date or "")
+    return out
+
+
+def _text_row(conn, r) -> tuple:
+    _, aid, headline, kw, body = r
+    try:
+        keywords = _list_json(kw)
+    except Exception:
+        keywords = []
+    return aid, headline or "", keywords, _decode_body(conn, body) or ""
+
+
+def iter_article_texts(ids: Iterable[str] | None = None, batch_size: int = 500):
+    """
+    Yield (article_id, headline, keywords list, body text) for all articles,
+    or just `ids`, in batches so bodies are decompressed a few at a time.
+    """
+    sql = "SELECT rowid, article_id, headline, keywords, body FROM articles"
+    with get_conn() as conn:
+        if ids is None:
+            last_rowid = 0
+            while True:
+                rows = conn.execute(f"{sql} WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                                    (last_rowid, batch_size)).fetchall()
+                if not rows:
+                    return
+                for r in rows:
+                    yield _text_row(conn, r)
+                last_rowid = rows[-1][0]
+        ids = list(ids)
+        for start in range(0, len(ids), batch_size):
+            chunk = ids[start:start + batch_size]
+            rows = conn.execute(f"{sql} WHERE article_id IN ({','.join('?' * len(chunk))})", chunk).fetchall()
+            for r in rows:
+                yield _text_row(conn, r)
+
+
+def train_body_dict(dict_size: int = 112_640, max_samples: int = 5000) -> int:
+    """Train a zstd dictionary on stored bodies; new writes use it. Returns its dict_id."""
+    z = _zstd()
+    if z is None:
+        raise RuntimeError("Training a dictionary needs the zstandard package (and BODY_COMPRESSION auto|zstd)")
+    with get_conn() as conn:
+        rows = conn.execute(
+            "SELECT body FROM articles WHERE body IS NOT NULL ORDER BY fetched_at DESC LIMIT ?", (max_samples,)
+        ).fetchall()
+        samples = [b.encode("utf-8") for b in (_decode_body(conn, r[0]) for r in rows) if b]
+        if len(samples) < 10:
+            raise RuntimeError(f"Need at least 10 stored bodies to train a dictionary (have {len(samples)})")
+        zdict = z.train_dictionary(dict_size, samples)
+        cur = conn.execute("INSERT INTO body_dicts (data) VALUES (?)", (zdict.as_bytes(),))
+        return cur.lastrowid
+
+
+def compress_bodies(recompress: bool = False, batch_size: int = 500) -> int:
+    """
+    Migrate stored bodies to the current codec. By default only legacy TEXT
+    rows are rewritten; recompress=True also re-encodes existing BLOBs (e.g.
+    after training a new dictionary). Returns rows rewritten.
+    """
+    where = "body IS NOT NULL" if recompress else "typeof(body) = 'text'"
+    done, last_rowid = 0, 0
+    while True:
+        with get_conn() as conn:
+            rows = conn.execute(
+                f"SELECT rowid, body FROM articles WHERE rowid > ? AND {where} ORDER BY rowid LIMIT ?",
+                (last_rowid, batch_size),
+            ).fetchall()
+            if not rows:
+                return done
+            conn.executemany(
+                "UPDATE articles SET body = ? WHERE rowid = ?",
+                [(_encode_body(conn, _decode_body(conn, body)), rowid) for rowid, body in rows],
+            )
+        done += len(rows)
+        last_rowid = rows[-1][0]
+
+
+def body_storage_bytes() -> tuple[int, int]:
+    """(rows with a body, total stored bytes of the body column)."""
+    with get_conn() as conn:
+        n, size = conn.execute(
+            "SELECT COUNT(body), COALESCE(SUM(length(CAST(body AS BLOB))), 0) FROM articles"
+        ).fetchone()
+        return n, size
+
+
+def has_body_dict() -> bool:
+    with get_conn() as conn:
+        return conn.execute("SELECT 1 FROM body_dicts LIMIT 1").fetchone() is not None
+
+
+# --- read-only queries (service.py) -------------------------------------------
+ARTICLE_LIST_COLS = [
+    "article_id", "url", "headline", "publish_date", "keywords", "companies_ranked",
+    "primary_company", "company_one_liner", "summary_zh_tw", "summary_en", "fetched_at",
+]
+
+
+def connect_readonly(db_path: Path | str = DB_PATH) -> sqlite3.Connection:
+    conn = sqlite3.connect(f"file:{Path(db_path).as_posix()}?mode=ro", uri=True, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def data_version(conn: sqlite3.Connection) -> int:
+    """Latest change-feed seq; moves on every upsert and delete, from any process."""
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'article_changes'").fetchone()
+    return row[0] if row else 0
+
+
+def query_articles(conn: sqlite3.Connection, *, company: str | None = None, keyword: str | None = None,
+                   date_from: str | None = None, date_to: str | None = None,
+                   after: tuple[str, str] | None = None, limit: int = 20) -> tuple[list[dict], tuple | None]:
+    """
+    Newest-first article listing with keyset pagination on (publish_date, article_id).
+    `after` is the key returned by the previous page. Returns (rows, next_key | None).
+    """
+    where, params = [], []
+    if company:
+        where.append("primary_company = ?")
+        params.append(company)
+    if keyword:
+        where.append("EXISTS (SELECT 1 FROM json_each(articles.keywords) WHERE json_each.value = ?)")
+        params.append(keyword)
+    if date_from:
+        where.append("COALESCE(publish_date, '') >= ?")
+        params.append(date_from)
+    if date_to:
+        where.append("COALESCE(publish_date, '') <= ?")
+        params.append(date_to)
+    if after:
+        where.append("(COALESCE(publish_date, ''), article_id) < (?, ?)")
+        params.extend(after)
+    sql = f"SELECT {', '.join(ARTICLE_LIST_COLS)} FROM articles"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY COALESCE(publish_date, '') DESC, article_id DESC LIMIT ?"
+    params.append(int(limit) + 1)
+
+    rows = [dict(r) for r in conn.execute(sql, params)]
+    more = len(rows) > limit
+    rows = rows[:limit]
+    for r in rows:
+        _decode_list_fields(r)
+    next_key = (rows[-1]["publish_date"] or "", rows[-1]["article_id"]) if more and rows else None
+    return rows, next_key
@@ -0,0 +1,137 @@
+"""
+Adaptive request pacing shared by the crawler and parser sessions.
+
+One AdaptiveThrottle per host. The gap between requests follows AIMD:
+every fast, successful response shrinks it by a fixed step; a 429, a 5xx,
+a timeout or a slow response multiplies it. REQUEST_DELAY is the floor.
+`get()` adds retry with jittered exponential backoff for transient errors.
+"""
+from __future__ import annotations
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from tenacity import retry, stop_after_attempt, wait_random_exponential, retry_if_exception
+
+import metrics
+import sources
+from config import (
+    REQUEST_DELAY, REQUEST_MAX_DELAY, REQUEST_DELAY_STEP, REQUEST_SLOW_SECONDS,
+    HTTP_RETRIES, DEFAULT_TIMEOUT,
+)
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class AdaptiveThrottle:
+    def __init__(self, min_delay: float = REQUEST_DELAY, max_delay: float = REQUEST_MAX_DELAY,
+                 step: float = REQUEST_DELAY_STEP, backoff: float = 2.0, slow: float = REQUEST_SLOW_SECONDS):
+        self.min_delay = min_delay
+        self.max_delay = max(max_delay, min_delay)
+        self.step = step
+        self.backoff = backoff
+        self.slow = slow
+        self.delay = min_delay
+        self._next_at = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Block until this host's next request slot."""
+        with self._lock:
+            now = time.monotonic()
+            at = max(now, self._next_at)
+            self._next_at = at + self.delay
+        if at > now:
+            time.sleep(at - now)
+
+    def on_success(self, latency: float):
+        with self._lock:
+            if latency > self.slow:
+                self._increase()
+            else:
+                self.delay = max(self.min_delay, self.delay - self.step)
+
+    def on_error(self, retry_after: float | None = None):
+        with self._lock:
+            self._increase()
+            if retry_after:
+                self.delay = min(self.max_delay, max(self.delay, retry_after))
+                self._next_at = max(self._next_at, time.monotonic() + retry_after)
+
+    def set_min_delay(self, min_delay: float):
+        """Raise or lower the floor; the current gap is pushed up to it if needed."""
+        with self._lock:
+            self.min_delay = min_delay
+            self.max_delay = max(self.max_delay, min_delay)
+            self.delay = max(self.delay, min_delay)
+
+    def _increase(self):
+        self.delay = min(self.max_delay, max(self.delay * self.backoff, self.step, self.min_delay))
+
+
+_throttles: dict[str, AdaptiveThrottle] = {}
+_throttles_lock = threading.Lock()
+
+
+def for_host(url: str) -> AdaptiveThrottle:
+    """
+    The throttle for url's host. A registered source's min_delay overrides
+    REQUEST_DELAY, whichever code path (crawl, fetch, queue worker) asks first.
+    """
+    host = urlparse(url).netloc.lower()
+    with _throttles_lock:
+        t = _throttles.get(host)
+        if t is None:
+            t = _throttles[host] = AdaptiveThrottle()
+            source = sources.for_url(url)
+            if source.host == host and source.min_delay is not None:  # for_url falls back to the default source
+                t.set_min_delay(source.min_delay)
+    return t
+
+
+def _retry_after(resp: requests.Response | None) -> float | None:
+    value = resp.headers.get("Retry-After") if resp is not None else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def _is_transient(exc: BaseException) -> bool:
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code in RETRY_STATUS
+    return False
+
+
+def _count_retry(retry_state):
+    metrics.inc("http_retries")
+
+
+@retry(
+    stop=stop_after_attempt(HTTP_RETRIES),
+    wait=wait_random_exponential(multiplier=1, max=30),
+    retry=retry_if_exception(_is_transient),
+    before_sleep=_count_retry,
+    reraise=True,
+)
+def get(session: requests.Session, url: str, timeout: float = DEFAULT_TIMEOUT) -> requests.Response:
+    """Paced GET with AIMD feedback; raises requests errors after HTTP_RETRIES attempts."""
+    throttle = for_host(url)
+    throttle.wait()
+    t0 = time.monotonic()
+    try:
+        r = session.get(url, timeout=timeout)
+    except (requests.ConnectionError, requests.Timeout):
+        throttle.on_error()
+        metrics.inc("http_errors")
+        raise
+    if r.status_code in RETRY_STATUS:
+        throttle.on_error(_retry_after(r))
+        metrics.inc("http_errors")
+    else:
+        throttle.on_success(time.monotonic() - t0)
+    r.raise_for_status()
+    return r
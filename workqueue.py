@@ -0,0 +1,183 @@
+"""
+Lease-based work queue for sharded crawl/enrich runs (`pipeline.py --coordinator/--worker`).
+
+One SQLite table of jobs keyed by article_id. A coordinator enqueues
+discovered URLs; workers claim small batches under a time-limited lease,
+process them and mark them done. A lease that is not completed or renewed
+in time (crashed or stuck worker) expires and the job is handed out again,
+so nothing is lost; a job that keeps failing is parked as 'failed' after
+QUEUE_MAX_ATTEMPTS claims. Writes go through upsert_article, so a job processed
+twice after a lease race is harmless.
+
+The queue DB runs in WAL mode by default, which is only safe when every
+process is on one host (WAL keeps its index in shared memory). For
+workers on several hosts, put it on a filesystem with working POSIX
+locks and set QUEUE_JOURNAL_MODE=delete (and DB_JOURNAL_MODE=delete for
+the shared news.db); SQLite over plain NFS/SMB is not safe in any mode.
+"""
+from __future__ import annotations
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable
+
+import metrics
+from config import QUEUE_DB_PATH, QUEUE_JOURNAL_MODE, QUEUE_LEASE_SECONDS, QUEUE_MAX_ATTEMPTS
+from storage import set_journal_mode
+
+
+class WorkQueue:
+    def __init__(self, db_path: Path | str = QUEUE_DB_PATH, max_attempts: int = QUEUE_MAX_ATTEMPTS,
+                 journal_mode: str = QUEUE_JOURNAL_MODE):
+        self.db_path = Path(db_path)
+        self.max_attempts = max_attempts
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._conn() as conn:
+            set_journal_mode(conn, journal_mode)
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                  article_id TEXT PRIMARY KEY,
+                  url TEXT NOT NULL,
+                  state TEXT NOT NULL DEFAULT 'pending',  -- pending | leased | done | failed
+                  attempts INTEGER NOT NULL DEFAULT 0,
+                  lease_owner TEXT,
+                  lease_until REAL,  -- unix time
+                  last_error TEXT,
+                  updated_at REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs(state, lease_until);
+                """
+            )
+
+    @contextmanager
+    def _conn(self):
+        # autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+        conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _write(self):
+        """Write transaction; IMMEDIATE takes the lock up front so two claimers never pick the same rows."""
+        with self._conn() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    @metrics.timed("queue.enqueue")
+    def enqueue(self, jobs: Iterable[tuple[str, str]]) -> int:
+        """
+        Add (article_id, url) jobs. The caller only passes ids missing from the
+        DB, so a 'done' job comes back as pending with a fresh attempt budget
+        (e.g. after `manage.py delete`). Pending and leased jobs are left
+        alone, and so are 'failed' ones: an article that keeps failing is
+        rediscovered on every crawl, and only retry_failed() re-opens it.
+        Returns jobs added or re-queued.
+        """
+        now = time.time()
+        with self._write() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT INTO jobs (article_id, url, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(article_id) DO UPDATE SET state = 'pending', attempts = 0, url = excluded.url, "
+                "lease_owner = NULL, lease_until = NULL, last_error = NULL, updated_at = excluded.updated_at "
+                "WHERE jobs.state = 'done'",
+                [(aid, url, now) for aid, url in jobs],
+            )
+            return conn.total_changes - before
+
+    @metrics.timed("queue.claim")
+    def claim(self, worker: str, n: int, lease_seconds: float = QUEUE_LEASE_SECONDS) -> list[tuple[str, str]]:
+        """Lease up to n pending (or lease-expired) jobs to `worker`. Returns [(article_id, url)]."""
+        now = time.time()
+        with self._write() as conn:
+            expired = conn.execute(
+                "UPDATE jobs SET state = 'failed', lease_owner = NULL, lease_until = NULL, updated_at = ?, "
+                "last_error = COALESCE(last_error, 'lease expired') "
+                "WHERE state = 'leased' AND lease_until < ? AND attempts >= ?",
+                (now, now, self.max_attempts),
+            ).rowcount
+            if expired:
+                metrics.inc("queue_gave_up", expired)
+            # expired leases first (oldest work), then pending jobs in enqueue order
+            rows = conn.execute(
+                "SELECT article_id, url, state FROM jobs WHERE state = 'leased' AND lease_until < ? "
+                "ORDER BY lease_until LIMIT ?",
+                (now, n),
+            ).fetchall()
+            if len(rows) < n:
+                rows += conn.execute(
+                    "SELECT article_id, url, state FROM jobs WHERE state = 'pending' ORDER BY rowid LIMIT ?",
+                    (n - len(rows),),
+                ).fetchall()
+            conn.executemany(
+                "UPDATE jobs SET state = 'leased', lease_owner = ?, lease_until = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE article_id = ?",
+                [(worker, now + lease_seconds, now, aid) for aid, _, _ in rows],
+            )
+        reclaimed = sum(1 for _, _, state in rows if state == "leased")
+        if reclaimed:
+            metrics.inc("queue_reclaimed", reclaimed)
+        return [(aid, url) for aid, url, _ in rows]
+
+    def renew(self, worker: str, ids: Iterable[str], lease_seconds: float = QUEUE_LEASE_SECONDS) -> int:
+        """Extend the lease on jobs `worker` still holds. Returns how many it still holds."""
+        now = time.time()
+        with self._write() as conn:
+            return sum(
+                conn.execute(
+                    "UPDATE jobs SET lease_until = ?, updated_at = ? "
+                    "WHERE article_id = ? AND state = 'leased' AND lease_owner = ?",
+                    (now + lease_seconds, now, aid, worker),
+                ).rowcount
+                for aid in ids
+            )
+
+    def complete(self, worker: str, ids: Iterable[str]) -> int:
+        """Mark jobs done. Also accepted after the lease moved on: the write was idempotent anyway."""
+        now = time.time()
+        with self._write() as conn:
+            return sum(
+                conn.execute(
+                    "UPDATE jobs SET state = 'done', lease_owner = ?, lease_until = NULL, last_error = NULL, "
+                    "updated_at = ? WHERE article_id = ? AND state != 'done'",
+                    (worker, now, aid),
+                ).rowcount
+                for aid in ids
+            )
+
+    def fail(self, worker: str, article_id: str, error: str):
+        """Give a job back: pending again, or 'failed' once it has used up its attempts."""
+        with self._write() as conn:
+            conn.execute(
+                "UPDATE jobs SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "lease_owner = NULL, lease_until = NULL, last_error = ?, updated_at = ? "
+                "WHERE article_id = ? AND state = 'leased' AND lease_owner = ?",
+                (self.max_attempts, error[:500], time.time(), article_id, worker),
+            )
+
+    def retry_failed(self) -> int:
+        """Put every 'failed' job back to pending with a fresh attempt budget."""
+        with self._write() as conn:
+            return conn.execute(
+                "UPDATE jobs SET state = 'pending', attempts = 0, updated_at = ? WHERE state = 'failed'",
+                (time.time(),),
+            ).rowcount
+
+    def stats(self) -> dict[str, int]:
+        """Job counts per state, plus 'expired' (leased but past the lease)."""
+        with self._conn() as conn:
+            out = {s: 0 for s in ("pending", "leased", "done", "failed")}
+            out.update(dict(conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state")))
+            out["expired"] = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE state = 'leased' AND lease_until < ?", (time.time(),)
+            ).fetchone()[0]
+            return out